@@ -1,38 +1,27 @@
 # SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
 # SPDX-License-Identifier: MPL-2.0
 
-import math
+import os
+import sys
 
-import matplotlib.pyplot as plot
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-
-
-def frange(start: float, stop: float, samples: int) -> list[float]:
-	"""
-	Generates a list of floats in the interval (start, stop) with a fixed step, (stop - start) / samples.
-	"""
-	step = (stop - start) / samples
-	out: list[float] = []
-	for i in range(0, samples):
-		out.append(start + step * i)
-	return out
-
-def cos_wave(t: list[float], f: float) -> list[float]:
-	"""
-	Generates a cosine wave with a list of timepoints and a frequency.
-	"""
-	return [math.cos(2 * math.pi * f * tx) for tx in t]
+from eee111.plotting import plot_decimated, pyplot
+from eee111.wavecache import cos_wave, frange
 
 
 
 def __main__():
-	t = frange(0, 0.001, 1000)
-	cos = cos_wave(t, 10000)
+	grid = (0, 0.001, 1000)
+	t = frange(*grid)
+	cos = cos_wave(grid, 1, 10000)
 
+	plot = pyplot()
 	figure, axis = plot.subplots()
-	axis.plot(t, cos)
+	plot_decimated(axis, t, cos)
 	plot.show()
 
 
 
-__main__()
+if __name__ == "__main__":
+	__main__()
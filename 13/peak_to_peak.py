@@ -1,62 +1,58 @@
 # SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
 # SPDX-License-Identifier: MPL-2.0
 
-import math
-
-import matplotlib.pyplot as plot
-
-
-
-def frange(start: float, stop: float, samples: int) -> list[float]:
-	"""
-	Generates a list of floats in the interval (start, stop) with a fixed step, (stop - start) / samples.
-	"""
-	step = (stop - start) / samples
-	out: list[float] = []
-	for i in range(0, samples):
-		out.append(start + step * i)
-	return out
-
-def derivative(x: list[float], y: list[float]) -> list[float]:
-	"""
-	Generates a list of floats corresponding to the slope of each consecutive pair of x and y coordinates.
-	"""
-	d = [0.0]
-	for i in range(1, len(x)):
-		dx = x[i] - x[i - 1]
-		dy = y[i] - y[i - 1]
-		d.append(dy / dx)
-	return d
-
-def integral(x: list[float], y: list[float]) -> list[float]:
-	"""
-	Generates a list of floats corresponding to the area below the function from zero to every x coordinate.
-	"""
-	I = [0.0]
-	accum = 0.0
-	for i in range(1, len(x)):
-		dx = x[i] - x[i - 1]
-		accum += dx * y[i]
-		I.append(accum)
-	return I
-
-def factor(l: list[float], a: float) -> list[float]:
-	"""
-	Multiplies all elements in the list by a factor a.
-	"""
-	return [a * lx for lx in l]
-
-def add(a: list[float], b: list[float]) -> list[float]:
-	"""
-	Returns a list of floats corresponding to the element-wise sums of a and b.
-	"""
-	return [a + b for a, b in zip(a, b, strict=True)]
-
-def cos_wave(t: list[float], a: float, f: float) -> list[float]:
-	"""
-	Generates a cosine wave with a list of timepoints , an amplitude, and a frequency.
-	"""
-	return [a * math.cos(2 * math.pi * f * tx) for tx in t]
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eee111 import wavecache
+from eee111.plotting import plot_decimated, pyplot
+from eee111.rlc import adaptive_sweep, parallel_sweep, phasor_deviation, phasor_peak_to_peak, sweep_peak_to_peak
+
+
+
+USAGE = "Usage: peak_to_peak.py [time | phasor | check | adaptive [tolerance:float] | grid <l:range> <c:range> <f:range> [workers:int]]"
+
+def grid_range(s: str) -> list[float]:
+	# Either a single value, or start:stop:count for count evenly spaced values from start to stop.
+	bounds = s.split(":")
+	if len(bounds) == 1:
+		values = [float(bounds[0])]
+
+	elif len(bounds) == 3 and int(bounds[2]) > 0:
+		values = numpy.linspace(float(bounds[0]), float(bounds[1]), int(bounds[2])).tolist()
+
+	else:
+		raise ValueError(f"Expected a value or start:stop:count, got {s}.")
+
+	if not all(value > 0 for value in values):
+		raise ValueError(f"Expected positive values, got {s}.")
+
+	return values
+
+def print_grid(t: numpy.ndarray, amplitude: float, resistance: float, args: list[str]):
+	# Prints "l c f vpp" for every point of the grid in order, and the throughput to stderr.
+	if len(args) not in (3, 4):
+		raise ValueError("Expected the l, c and f ranges and optionally the workers.")
+
+	l, c, f = (grid_range(arg) for arg in args[:3])
+	workers = int(args[3]) if len(args) > 3 else os.cpu_count() or 1
+	if workers < 1:
+		raise ValueError("Expected at least one worker.")
+
+	start = time.perf_counter()
+
+	points = 0
+	for lx, cx, fx, vpp in parallel_sweep(t.tolist(), amplitude, resistance, l, c, f, workers):
+		print(f"{lx:.6g} {cx:.6g} {fx:.6g} {vpp:.9f}")
+		points += 1
+
+	elapsed = time.perf_counter() - start
+	print(f"{points} points in {elapsed:.3f} s on {workers} workers ({points / max(elapsed, 1e-9):.1f} points/s)", file=sys.stderr)
 
 
 
@@ -75,22 +71,61 @@ def __main__():
 	inductance = 0.120
 	capacitance = 0.000001
 
-	data = []
+	mode = sys.argv[1] if len(sys.argv) > 1 else "time"
+
+	t = wavecache.frange(0, 0.01, 1000)
+
+	if mode == "time":
+		data = sweep_peak_to_peak(t, amplitude, frequencies, resistance, inductance, capacitance)
+
+	elif mode == "phasor":
+		data = phasor_peak_to_peak(amplitude, frequencies, resistance, inductance, capacitance)
+
+	elif mode == "check":
+		phasor = phasor_peak_to_peak(amplitude, frequencies, resistance, inductance, capacitance)
+		deviation = numpy.abs(phasor_deviation(t, amplitude, frequencies, resistance, inductance, capacitance))
+		relative = deviation / phasor
+		print(f"Maximum deviation: {deviation.max():.9f} Vpp at f={frequencies[deviation.argmax()]} Hz")
+		print(f"Maximum relative deviation: {relative.max():.6f} at f={frequencies[relative.argmax()]} Hz")
+		return
+
+	elif mode == "adaptive":
+		try:
+			tolerance = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+			frequencies, data, evaluations = adaptive_sweep(
+				lambda f: sweep_peak_to_peak(t, amplitude, f, resistance, inductance, capacitance),
+				frequencies[0], frequencies[-1], tolerance
+			)
+
+		except ValueError as e:
+			print(e, file=sys.stderr)
+			print(USAGE)
+			sys.exit(1)
+
+		print(f"Minimum Vpp: {data.min():.9f} Vpp at f={frequencies[data.argmin()]:.6f} Hz")
+		print(f"Kernel evaluations: {evaluations}")
+
+	elif mode == "grid":
+		try:
+			print_grid(t, amplitude, resistance, sys.argv[2:])
+
+		except ValueError as e:
+			print(e, file=sys.stderr)
+			print(USAGE)
+			sys.exit(1)
+
+		return
 
-	for frequency in frequencies:
-		t = frange(0, 0.01, 1000)
-		cos = cos_wave(t, amplitude, frequency)
-		vr = factor(cos, resistance)
-		vl = factor(derivative(t, cos), inductance)
-		vc = factor(integral(t, cos), 1 / capacitance)
-		vs = add(add(vr, vl), vc)
-		vpp = max(vs) - min(vs)
-		data.append(vpp)
+	else:
+		print(USAGE)
+		sys.exit(1)
 
+	plot = pyplot()
 	figure, axis = plot.subplots()
-	axis.plot(frequencies, data)
+	plot_decimated(axis, frequencies, data, marker="." if mode == "adaptive" else None)
 	plot.show()
 
 
 
-__main__()
+if __name__ == "__main__":
+	__main__()
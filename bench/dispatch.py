@@ -0,0 +1,108 @@
+# SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
+# SPDX-License-Identifier: 0BSD
+
+from types import ModuleType
+from typing import Any
+
+import importlib.util
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from eee111.commands import CommandSpec, Rule, Transform, compile_commandspecs, dispatch, parse_compiled
+
+
+
+TOOLS = {
+	"MS1.1": ["1000 0.01 1000", "1000 0.01 1000 out x.txt f32", "help", "not a command"],
+	"MS1.2": ["100 200 1 1000", "100 200 1 1000 continuous out x.txt", "psk 2000 0,90,180,270 1 1000 out x.txt f32", "not a command"],
+	"MS2.1": ["1000", "1000 bulk", "file x.txt", "not a command"],
+	"MS2.2": ["1000 8", "1000 8 tone 100 200", "file x.txt 8 psk 2000 0,90,180,270", "stream 1000 preamble 8", "not a command"]
+}
+
+SAMPLE_LINE = "0.001000000 -0.587785252"
+
+
+
+def load_tool(name: str) -> ModuleType:
+	path = os.path.join(ROOT, "sp2", f"jocson_nile_202400045_{name}.py")
+
+	spec = importlib.util.spec_from_file_location(f"jocson_nile_202400045_{name.replace('.', '_')}", path)
+	module = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(module)
+
+	return module
+
+
+
+def linear_parse(rules: list[Any], command: list[str]) -> list[Any] | None:
+	# The rule matching as it was before the rules were compiled.
+	if len(command) != len(rules):
+		return None
+
+	outputs = 0
+	for rule in rules:
+		outputs += len(rule.transforms)
+
+	parsed: list[Any] = [None] * outputs
+
+	for rule, arg in zip(rules, command):
+		if rule.find_string != None and rule.find_string != arg:
+			return None
+
+		try:
+			for transform in rule.transforms:
+				parsed[transform.position] = transform.convert(arg)
+
+		except:
+			return None
+
+	return parsed
+
+def linear_dispatch(specs: list[Any], command: list[str]) -> bool:
+	for spec in specs:
+
+		if (parsed := linear_parse(spec.rules, command)) != None:
+			return spec.callback(*parsed)
+
+	return False
+
+def per_call(statement: Any) -> float:
+	calls, _ = timeit.Timer(statement).autorange()
+	return min(timeit.Timer(statement).repeat(5, calls)) / calls
+
+
+
+def __main__():
+	print(f"{'tool':<6} {'line':<44} {'linear':>10} {'table':>10} {'speedup':>8}")
+
+	for name, lines in TOOLS.items():
+		tool = load_tool(name)
+
+		# The callbacks are swapped for ones that do nothing, so that only the matching is timed.
+		specs = [CommandSpec(spec.rules, lambda *args: True) for spec in tool.COMMANDS.specs]
+		table = compile_commandspecs(specs)
+
+		for line in lines:
+			command = line.split()
+
+			linear = per_call(lambda: linear_dispatch(specs, command))
+			compiled = per_call(lambda: dispatch(table, command, lambda: False))
+
+			print(f"{name:<6} {line:<44} {linear * 1e6:>8.2f}us {compiled * 1e6:>8.2f}us {linear / compiled:>7.1f}x")
+
+		if hasattr(tool, "SAMPLE_RULES"):
+			command = SAMPLE_LINE.split()
+
+			linear = per_call(lambda: linear_parse([Rule([Transform(float, 0)]), Rule([Transform(float, 1)])], command))
+			compiled = per_call(lambda: parse_compiled(tool.SAMPLE_RULES, command))
+
+			print(f"{name:<6} {'<sample> ' + SAMPLE_LINE:<44} {linear * 1e6:>8.2f}us {compiled * 1e6:>8.2f}us {linear / compiled:>7.1f}x")
+
+
+
+if __name__ == "__main__":
+	__main__()
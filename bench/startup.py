@@ -0,0 +1,98 @@
+# SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
+# SPDX-License-Identifier: 0BSD
+
+from dataclasses import dataclass
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 20
+
+# The samples that the analyzers read from their standard input.
+SAMPLES = "".join(f"{i / 9:.9f} {(-1) ** i:.9f}\n" for i in range(10))
+
+# Run in a fresh interpreter, this imports a script without running it, and prints whether that imported matplotlib.
+IMPORT_CHECK = """
+import importlib.util, sys
+spec = importlib.util.spec_from_file_location("tool", sys.argv[1])
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+print("matplotlib" in sys.modules)
+"""
+
+
+
+@dataclass
+class Start:
+	name : str
+	args : list[str]
+	stdin: str = ""
+
+def script(path: str) -> str:
+	return os.path.join(ROOT, path)
+
+STARTS = [
+	Start("python", ["-c", "pass"]),
+	Start("python + numpy", ["-c", "import numpy"]),
+	Start("MS1.1 print_sine", [script("sp2/jocson_nile_202400045_MS1.1.py"), "1", "1", "10"]),
+	Start("MS1.1 out", [script("sp2/jocson_nile_202400045_MS1.1.py"), "1", "1", "10", "out", os.devnull]),
+	Start("MS1.2 print_fsk", [script("sp2/jocson_nile_202400045_MS1.2.py"), "1", "2", "1", "10"], "01\n"),
+	Start("MS1.2 out_fsk", [script("sp2/jocson_nile_202400045_MS1.2.py"), "1", "2", "1", "10", "out", os.devnull], "01\n"),
+	Start("MS2.1 print_crossing", [script("sp2/jocson_nile_202400045_MS2.1.py"), "10"], SAMPLES),
+	Start("MS2.2 print_demodulate", [script("sp2/jocson_nile_202400045_MS2.2.py"), "10", "1"], SAMPLES)
+]
+
+SCRIPTS = [
+	"sp2/jocson_nile_202400045_MS1.1.py",
+	"sp2/jocson_nile_202400045_MS1.2.py",
+	"sp2/jocson_nile_202400045_MS2.1.py",
+	"sp2/jocson_nile_202400045_MS2.2.py",
+	"13/cos_wave.py",
+	"13/voltage.py",
+	"13/peak_to_peak.py"
+]
+
+
+
+def run(args: list[str], stdin: str = "") -> tuple[float, str]:
+	start = time.perf_counter()
+	done = subprocess.run([sys.executable, *args], input=stdin, capture_output=True, text=True, cwd=ROOT)
+	seconds = time.perf_counter() - start
+
+	if done.returncode != 0:
+		raise RuntimeError(f"{' '.join(args)} exited with {done.returncode}: {done.stderr.strip()}")
+
+	return seconds, done.stdout
+
+def timings(start: Start, runs: int) -> list[float]:
+	return [run(start.args, start.stdin)[0] for _ in range(runs)]
+
+
+
+def __main__():
+	parser = argparse.ArgumentParser(description="Times how long the tools take to start, run a text command and exit.")
+	parser.add_argument("--runs", type=int, default=RUNS, help="times to start each command")
+	args = parser.parse_args()
+
+	print(f"{'command':<24} {'best':>9} {'median':>9}")
+	for start in STARTS:
+		seconds = timings(start, args.runs)
+		print(f"{start.name:<24} {min(seconds) * 1e3:>7.1f}ms {statistics.median(seconds) * 1e3:>7.1f}ms", flush=True)
+
+	# Importing a script must neither start its prompt nor plot, and only plotting may import matplotlib.
+	print()
+	print(f"{'script':<36} {'import':>9}  matplotlib")
+	for path in SCRIPTS:
+		seconds, output = min(run(["-c", IMPORT_CHECK, script(path)]) for _ in range(args.runs))
+		print(f"{path:<36} {seconds * 1e3:>7.1f}ms  {'imported' if output.strip() == 'True' else 'not imported'}", flush=True)
+
+
+
+if __name__ == "__main__":
+	__main__()
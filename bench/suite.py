@@ -0,0 +1,266 @@
+# SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
+# SPDX-License-Identifier: 0BSD
+
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eee111 import commands, crossings, demod, keying, numerics, rlc, sampleio, waveform, wavecache
+
+
+
+SIZES = [10 ** exponent for exponent in range(3, 9)]
+DEFAULT_SIZES = SIZES[:4]
+PYTHON_LIMIT = 10 ** 6
+
+TIMING = 0.01
+PROBE_SIZE = 10 ** 5
+TOLERANCE = 0.25
+MEMORY_SLACK = 1 << 20
+
+# Every case that needs a signal gets the same FSK capture, built from these.
+FREQUENCY0 = 100.0
+FREQUENCY1 = 200.0
+POINTS_PER_BIT = 1000
+
+
+
+@dataclass
+class Case:
+	name : str
+	setup: Callable[[int], Callable[[], Any]]
+	limit: int = SIZES[-1]
+
+def bits_for(n: int) -> str:
+	bits = numpy.random.default_rng(0).integers(0, 2, max(n // POINTS_PER_BIT, 1))
+	return "".join("1" if bit else "0" for bit in bits.tolist())
+
+def fsk_signal(n: int) -> tuple[numpy.ndarray, numpy.ndarray]:
+	return keying.fsk_array(FREQUENCY0, FREQUENCY1, 1.0, n, bits_for(n))
+
+def cold(generate: Callable[[], Any]) -> Callable[[], Any]:
+	# The waveform cache is emptied before every run, so that the generator is timed rather than the lookup.
+	def run() -> Any:
+		wavecache.cache.clear()
+		return generate()
+
+	return run
+
+def consume(chunks: Callable[[], Any]) -> Callable[[], int]:
+	def run() -> int:
+		return sum(len(v) for _, v in chunks())
+
+	return run
+
+def sample_text(n: int) -> str:
+	t, v = fsk_signal(n)
+	return sampleio.format_samples(t, v).decode()
+
+def stream_demodulate(t: numpy.ndarray, v: numpy.ndarray, bit_duration: float) -> list[bool]:
+	demodulator = demod.StreamDemodulator(bit_duration)
+
+	bits: list[bool] = []
+	for begin in range(0, len(t), sampleio.BLOCK_LINES):
+		bits.extend(demodulator.add_chunk(t[begin:begin + sampleio.BLOCK_LINES], v[begin:begin + sampleio.BLOCK_LINES]))
+
+	return bits + demodulator.flush()
+
+def parse_lines(lines: list[list[str]]) -> int:
+	parsed = 0
+	for line in lines:
+		parsed += commands.parse_compiled(sampleio.SAMPLE_RULES, line) != None
+
+	return parsed
+
+def with_signal(run: Callable[..., Any]) -> Callable[[int], Callable[[], Any]]:
+	def setup(n: int) -> Callable[[], Any]:
+		t, v = fsk_signal(n)
+		return partial(run, n, t, v)
+
+	return setup
+
+
+
+CASES = [
+	Case("waveform.arange", lambda n: partial(waveform.arange, 0.0, 1.0, n)),
+	Case("wavecache.frange", lambda n: cold(partial(wavecache.frange, 0.0, 1.0, n))),
+	Case("wavecache.cos_wave", lambda n: cold(partial(wavecache.cos_wave, (0.0, 1.0, n), 1.0, 1000.0))),
+	Case("rlc.cos_samples", lambda n: partial(rlc.cos_samples, wavecache.frange(0.0, 1.0, n), 1.0, 1000.0)),
+	Case("numerics.derivative", with_signal(lambda n, t, v: numerics.derivative(t, v, "backward"))),
+	Case("numerics.integral", with_signal(lambda n, t, v: numerics.integral(t, v, "rectangle"))),
+	Case("numerics.integral simpson", with_signal(lambda n, t, v: numerics.integral(t, v, "simpson"))),
+	Case("rlc.peak_to_peak", lambda n: partial(rlc.peak_to_peak, wavecache.frange(0.0, 0.01, n), 5e-4, 1000.0, 1.0, 0.12, 1e-6)),
+	Case(
+		"rlc.sweep_peak_to_peak",
+		lambda n: partial(
+			rlc.sweep_peak_to_peak, wavecache.frange(0.0, 0.01, 1000), 5e-4, numpy.arange(100.0, 100.0 + max(n // 1000, 1)),
+			1.0, 0.12, 1e-6
+		)
+	),
+	Case("waveform.time_value", lambda n: partial(waveform.time_value, partial(waveform.sine, 1000.0, 0.0), 0.0, 1.0, n)),
+	Case("waveform.time_value_chunks", lambda n: consume(partial(waveform.time_value_chunks, partial(waveform.sine, 1000.0, 0.0), 0.0, 1.0, n))),
+	Case("waveform.sine_signal", lambda n: partial(waveform.sine_signal, 1000.0, 0.0, 0.0, 1.0, n)),
+	Case("waveform.sine_chunks", lambda n: consume(partial(waveform.sine_chunks, 1000.0, 0.0, 0.0, 1.0, n))),
+	Case("keying.fsk_array", lambda n: partial(keying.fsk_array, FREQUENCY0, FREQUENCY1, 1.0, n, bits_for(n))),
+	Case("keying.fsk_signal", lambda n: partial(keying.fsk_signal, FREQUENCY0, FREQUENCY1, 1.0, n, bits_for(n))),
+	Case("keying.fsk_chunks", lambda n: consume(partial(keying.fsk_chunks, FREQUENCY0, FREQUENCY1, 1.0, n, bits_for(n)))),
+	Case("sampleio.format_samples", with_signal(lambda n, t, v: sampleio.format_samples(t, v)), 10 ** 7),
+	Case("sampleio.parse_samples", lambda n: partial(sampleio.parse_samples, sample_text(n)), 10 ** 7),
+	Case("commands.parse_compiled", lambda n: partial(parse_lines, [line.split() for line in sample_text(n).splitlines()]), PYTHON_LIMIT),
+	Case("crossings.count_crossings", with_signal(lambda n, t, v: crossings.count_crossings(zip(t.tolist(), v.tolist()))), PYTHON_LIMIT),
+	Case(
+		"crossings.count_value_crossings",
+		with_signal(lambda n, t, v: crossings.count_value_crossings(v[begin:begin + sampleio.BLOCK_LINES] for begin in range(0, n, sampleio.BLOCK_LINES)))
+	),
+	Case("demod.demodulate", with_signal(lambda n, t, v: demod.demodulate(len(bits_for(n)), list(zip(t.tolist(), v.tolist())))), PYTHON_LIMIT),
+	Case("demod.demodulate_samples", with_signal(lambda n, t, v: demod.demodulate_samples(len(bits_for(n)), t, v))),
+	Case("demod.tone_demodulate", with_signal(lambda n, t, v: demod.tone_demodulate(len(bits_for(n)), t, v, FREQUENCY0, FREQUENCY1))),
+	Case("demod.StreamDemodulator", with_signal(lambda n, t, v: stream_demodulate(t, v, 1.0 / len(bits_for(n)))))
+]
+
+
+
+def measure(run: Callable[[], Any], budget: float) -> tuple[float, int]:
+	# Every timing loops the case for at least TIMING seconds, so that short cases are not lost in the noise, and the
+	# best of as many timings as fit in the budget, up to five, is kept. The peak of the memory allocated is then
+	# taken from one more run, as tracing slows everything down.
+	start = time.perf_counter()
+	run()
+	number = max(1, math.ceil(TIMING / (time.perf_counter() - start)))
+
+	times: list[float] = []
+	while len(times) < 5 and (len(times) == 0 or sum(times) * number < budget):
+		start = time.perf_counter()
+		for _ in range(number):
+			run()
+
+		times.append((time.perf_counter() - start) / number)
+
+	return min(times), traced_peak(run)
+
+def traced_peak(run: Callable[[], Any]) -> int:
+	tracemalloc.start()
+	try:
+		run()
+		_, peak = tracemalloc.get_traced_memory()
+
+	finally:
+		tracemalloc.stop()
+
+	return peak
+
+def memory_estimate(case: Case, n: int) -> int:
+	# Running out of memory gets the process killed rather than raising MemoryError, so large sizes are first set up
+	# and run at PROBE_SIZE, and their peak is scaled up to n.
+	return traced_peak(lambda: case.setup(PROBE_SIZE)()) * n // PROBE_SIZE
+
+def available_memory() -> int | None:
+	try:
+		return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+
+	except (AttributeError, ValueError, OSError):
+		return None
+
+def machine() -> dict[str, Any]:
+	return {
+		"python"   : platform.python_version(),
+		"numpy"    : numpy.__version__,
+		"platform" : platform.platform(),
+		"processor": platform.processor(),
+		"cpus"     : os.cpu_count()
+	}
+
+def compare(result: dict[str, float], baseline: dict[str, float] | None, tolerance: float) -> tuple[str, bool]:
+	if baseline == None:
+		return "", False
+
+	ratio = result["seconds"] / baseline["seconds"]
+	slower = ratio > 1 + tolerance
+	bigger = result["peak"] > baseline["peak"] * (1 + tolerance) + MEMORY_SLACK
+
+	flags = [flag for flag, raised in (("SLOWER", slower), ("MORE MEMORY", bigger)) if raised]
+	return f"{ratio:.2f}x {' '.join(flags)}".rstrip(), slower or bigger
+
+def sizes(s: str) -> list[int]:
+	return [int(float(size)) for size in s.split(",")]
+
+
+
+def __main__():
+	parser = argparse.ArgumentParser(description="Times the generators and analyzers of the eee111 package.")
+	parser.add_argument("--sizes", type=sizes, default=DEFAULT_SIZES, help="comma-separated sample counts, such as 1e3,1e8")
+	parser.add_argument("--cases", default="", help="comma-separated substrings of the case names to run")
+	parser.add_argument("--budget", type=float, default=0.5, help="seconds of repeated runs per case and size")
+	parser.add_argument("--save", help="file to save the results to as a baseline")
+	parser.add_argument("--baseline", help="baseline file to compare the results against")
+	parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="fraction a result may exceed its baseline by")
+	args = parser.parse_args()
+
+	baseline: dict[str, dict[str, dict[str, float]]] = {}
+	if args.baseline != None:
+		with open(args.baseline, "r") as file:
+			saved = json.load(file)
+
+		baseline = saved["results"]
+		if saved["machine"] != machine():
+			print(f"The baseline was saved on another setup, {saved['machine']}, so its times may not compare.", file=sys.stderr)
+
+	filters = [name for name in args.cases.split(",") if name != ""]
+	results: dict[str, dict[str, dict[str, float]]] = {}
+	regressions = 0
+
+	print(f"{'case':<32} {'size':>10} {'time':>11} {'samples/s':>11} {'peak':>10}  baseline")
+
+	for case in CASES:
+		if filters != [] and not any(name in case.name for name in filters):
+			continue
+
+		for n in args.sizes:
+			if n > case.limit:
+				print(f"{case.name:<32} {n:>10} {'skipped, above ' + format(case.limit, '.0e'):>34}")
+				continue
+
+			if n > PROBE_SIZE and (available := available_memory()) != None and (needed := memory_estimate(case, n)) > available:
+				print(f"{case.name:<32} {n:>10} {f'skipped, needs about {needed / (1 << 30):.1f}GB':>34}")
+				continue
+
+			try:
+				seconds, peak = measure(case.setup(n), args.budget)
+
+			except MemoryError:
+				print(f"{case.name:<32} {n:>10} {'out of memory':>34}")
+				continue
+
+			result = {"seconds": seconds, "peak": peak}
+			results.setdefault(case.name, {})[str(n)] = result
+
+			change, regressed = compare(result, baseline.get(case.name, {}).get(str(n)), args.tolerance)
+			regressions += regressed
+
+			print(f"{case.name:<32} {n:>10} {seconds * 1e3:>9.3f}ms {n / seconds:>11.3g} {peak / (1 << 20):>8.1f}MB  {change}", flush=True)
+
+	if args.save != None:
+		with open(args.save, "w") as file:
+			json.dump({"machine": machine(), "results": results}, file, indent="\t")
+
+	if regressions != 0:
+		print(f"{regressions} regressions beyond {args.tolerance:.0%} of the baseline.", file=sys.stderr)
+		sys.exit(1)
+
+
+
+if __name__ == "__main__":
+	__main__()
@@ -0,0 +1,198 @@
+# SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
+# SPDX-License-Identifier: 0BSD
+
+from typing import Callable
+
+import argparse
+import cmath
+import math
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eee111 import numerics, rlc
+
+
+
+# The circuit and current of 13/voltage.py.
+AMPLITUDE = 0.0005
+FREQUENCY = 1000.0
+RESISTANCE = 1.0
+INDUCTANCE = 0.120
+CAPACITANCE = 0.000001
+DURATION = 0.01
+
+# A 1V step into the same inductor and capacitor behind a resistor large enough to overdamp them, which settles within
+# a millisecond and is then flat.
+STEP_RESISTANCE = 1000.0
+STEP_DURATION = 0.02
+
+TOLERANCES = [1e-3, 1e-4, 1e-5, 1e-6, 1e-7]
+METHODS = [("backward", "rectangle"), ("central", "simpson")]
+LIMIT = 1 << 24
+REPEATS = 5
+
+
+
+def exact(t: numpy.ndarray) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+	# V_R, V_L and V_C while the current is AMPLITUDE cos(wt), as 13/voltage.py imposes it.
+	w = 2 * math.pi * FREQUENCY
+	return (
+		RESISTANCE * AMPLITUDE * numpy.cos(w * t),
+		-INDUCTANCE * AMPLITUDE * w * numpy.sin(w * t),
+		AMPLITUDE * numpy.sin(w * t) / (w * CAPACITANCE)
+	)
+
+def error(t: numpy.ndarray, vr: numpy.ndarray, vl: numpy.ndarray, vc: numpy.ndarray) -> float:
+	return max(float(numpy.abs(v - x).max()) for v, x in zip((vr, vl, vc), exact(t)))
+
+def solve(tolerance: float) -> rlc.Transient:
+	# Starting from the steady state, q = 0 and i = AMPLITUDE, the solution is exactly the imposed current.
+	return rlc.transient(rlc.phasor_source(AMPLITUDE, FREQUENCY, RESISTANCE, INDUCTANCE, CAPACITANCE), RESISTANCE, INDUCTANCE, CAPACITANCE, DURATION, tolerance, i=AMPLITUDE)
+
+def fixed_grid(points: int, derivative_method: str, integral_method: str) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+	# V_R, V_L and V_C as 13/voltage.py computes them, from the current on an evenly spaced grid.
+	t = DURATION / points * numpy.arange(points)
+	current = rlc.cos_samples(t, AMPLITUDE, FREQUENCY)
+
+	vr = rlc.factor(current, RESISTANCE)
+	vl = numerics.derivative(t, current, derivative_method, scale=INDUCTANCE)
+	vc = numerics.integral(t, current, integral_method, scale=1 / CAPACITANCE)
+
+	return t, vr, vl, vc
+
+def points_for_error(target: float, derivative_method: str, integral_method: str) -> int | None:
+	# The fewest grid points at which the fixed grid is as accurate as target, or None if LIMIT points are not enough.
+	def reached(points: int) -> bool:
+		return error(*fixed_grid(points, derivative_method, integral_method)) <= target
+
+	# Below a few points per period the errors alias and stop shrinking with more points.
+	low = max(2, math.ceil(4 * FREQUENCY * DURATION))
+	high = 2 * low
+	while not reached(high):
+		if high >= LIMIT:
+			return None
+
+		low, high = high, min(2 * high, LIMIT)
+
+	while high - low > 1:
+		middle = (low + high) // 2
+		if reached(middle):
+			high = middle
+
+		else:
+			low = middle
+
+	return high
+
+def step_exact(t: numpy.ndarray) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+	# V_R, V_L and V_C after the step, from the roots s1 and s2 of L s^2 + R s + 1 / C, with the circuit at rest before it.
+	root = cmath.sqrt(STEP_RESISTANCE ** 2 - 4 * INDUCTANCE / CAPACITANCE)
+	s1 = (-STEP_RESISTANCE + root) / (2 * INDUCTANCE)
+	s2 = (-STEP_RESISTANCE - root) / (2 * INDUCTANCE)
+
+	e1 = numpy.exp(s1 * t)
+	e2 = numpy.exp(s2 * t)
+	current = ((e1 - e2) / (INDUCTANCE * (s1 - s2))).real
+	vc = (1 + (s2 * e1 - s1 * e2) / (s1 - s2)).real
+
+	return STEP_RESISTANCE * current, 1 - STEP_RESISTANCE * current - vc, vc
+
+def step_error(solution: rlc.Transient) -> float:
+	return max(float(numpy.abs(v - x).max()) for v, x in zip((solution.vr, solution.vl, solution.vc), step_exact(solution.t)))
+
+def step_solve(tolerance: float | None, steps: int | None = None) -> rlc.Transient:
+	return rlc.transient(
+		lambda t: 1.0, STEP_RESISTANCE, INDUCTANCE, CAPACITANCE, STEP_DURATION, tolerance,
+		max_step=None if steps == None else STEP_DURATION / steps
+	)
+
+def steps_for_error(target: float) -> int | None:
+	# The fewest fixed steps at which the solver is as accurate as target, or None if LIMIT steps are not enough.
+	low = 1
+	high = 2
+	while step_error(step_solve(None, high)) > target:
+		if high >= LIMIT:
+			return None
+
+		low, high = high, min(2 * high, LIMIT)
+
+	while high - low > 1:
+		middle = (low + high) // 2
+		if step_error(step_solve(None, middle)) <= target:
+			high = middle
+
+		else:
+			low = middle
+
+	return high
+
+def best_time(run: Callable[[], object]) -> float:
+	times: list[float] = []
+	for _ in range(REPEATS):
+		start = time.perf_counter()
+		run()
+		times.append(time.perf_counter() - start)
+
+	return min(times)
+
+
+
+def __main__():
+	parser = argparse.ArgumentParser(
+		description="Compares the adaptive transient solver at equal accuracy with the fixed-grid voltages of 13/voltage.py "
+		"in the steady state, and with fixed steps on the step response of an overdamped circuit."
+	)
+	parser.add_argument("--tolerances", type=lambda s: [float(x) for x in s.split(",")], default=TOLERANCES, help="comma-separated step tolerances in volts")
+	args = parser.parse_args()
+
+	print(f"{'tolerance':>9} {'steps':>7} {'rejected':>8} {'max error':>10} {'time':>9}", end="")
+	for derivative_method, integral_method in METHODS:
+		print(f"  {derivative_method + '/' + integral_method + ' points':>26} {'time':>9}", end="")
+
+	print()
+
+	for tolerance in args.tolerances:
+		solution = solve(tolerance)
+		target = error(solution.t, solution.vr, solution.vl, solution.vc)
+		seconds = best_time(lambda: solve(tolerance))
+
+		print(f"{tolerance:>9.0e} {len(solution.t) - 1:>7} {solution.rejected:>8} {target:>10.2e} {seconds * 1e3:>7.2f}ms", end="")
+
+		for derivative_method, integral_method in METHODS:
+			points = points_for_error(target, derivative_method, integral_method)
+			if points == None:
+				print(f"  {'over ' + str(LIMIT):>26} {'':>9}", end="")
+
+			else:
+				grid = best_time(lambda: fixed_grid(points, derivative_method, integral_method))
+				print(f"  {points:>26} {grid * 1e3:>7.2f}ms", end="")
+
+		print(flush=True)
+
+	print()
+	print(f"{'tolerance':>9} {'steps':>7} {'rejected':>8} {'max error':>10} {'time':>9}  {'fixed steps':>11} {'time':>9}")
+
+	for tolerance in args.tolerances:
+		solution = step_solve(tolerance)
+		target = step_error(solution)
+		seconds = best_time(lambda: step_solve(tolerance))
+
+		print(f"{tolerance:>9.0e} {len(solution.t) - 1:>7} {solution.rejected:>8} {target:>10.2e} {seconds * 1e3:>7.2f}ms", end="")
+
+		steps = steps_for_error(target)
+		if steps == None:
+			print(f"  {'over ' + str(LIMIT):>11}", flush=True)
+
+		else:
+			fixed = best_time(lambda: step_solve(None, steps))
+			print(f"  {steps:>11} {fixed * 1e3:>7.2f}ms", flush=True)
+
+
+
+if __name__ == "__main__":
+	__main__()
@@ -0,0 +1,214 @@
+# SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
+# SPDX-License-Identifier: 0BSD
+
+from typing import Callable, NamedTuple
+
+import argparse
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eee111.demod import StreamDemodulator, demodulate, demodulate_samples
+from eee111.keying import fsk_array
+from eee111.sampleio import format_samples
+
+
+
+FREQ0 = 1000.0
+FREQ1 = 2000.0
+BIT_DURATION = 0.01
+PREAMBLE = "0101010101"
+RATE = 8000
+CHUNK = 4096
+CAPTURES = 500
+FORMAT_BLOCKS = 200
+
+
+
+class Case(NamedTuple):
+	name: str
+	run : Callable[[numpy.random.Generator, int], tuple[int, int, str]]
+
+
+
+def bitstring(bits: list[bool]) -> str:
+	return "".join("1" if bit else "0" for bit in bits)
+
+def random_bits(rng: numpy.random.Generator, bits: int) -> str:
+	return "".join(rng.choice(["0", "1"], bits))
+
+def stream(t: numpy.ndarray, v: numpy.ndarray, demodulator: StreamDemodulator, chunk: int = CHUNK) -> tuple[str, int]:
+	# The bits of a stream fed chunk by chunk, and the most crossings the demodulator held while looking for its preamble.
+	bits: list[bool] = []
+	held = 0
+	for begin in range(0, len(t), chunk):
+		bits += demodulator.add_chunk(t[begin:begin + chunk], v[begin:begin + chunk])
+		if demodulator.bit_duration == None:
+			held = max(held, len(demodulator.learned))
+
+	return bitstring(bits + demodulator.flush()), held
+
+def compare_bits(decoded: str, held: int, expected: str) -> tuple[int, int, str]:
+	errors = sum(a != b for a, b in zip(decoded, expected)) + abs(len(decoded) - len(expected))
+	return len(decoded), errors, f"held {held} crossings"
+
+def stream_case(points_per_bit: int, continuous: bool, learned: bool, chunk: int = CHUNK) -> Callable[[numpy.random.Generator, int], tuple[int, int, str]]:
+	def run(rng: numpy.random.Generator, bits: int) -> tuple[int, int, str]:
+		data = random_bits(rng, bits)
+		sent = PREAMBLE + data if learned else data
+		t, v = fsk_array(FREQ0, FREQ1, BIT_DURATION * len(sent), points_per_bit * len(sent), sent, continuous)
+
+		if learned:
+			return compare_bits(*stream(t, v, StreamDemodulator(None, len(PREAMBLE)), chunk), data)
+
+		return compare_bits(*stream(t, v, StreamDemodulator(BIT_DURATION, 0, (FREQ0 + FREQ1) / 2), chunk), data)
+
+	return run
+
+def lead_in_case(idle: float, noise: float, snr: float | None) -> Callable[[numpy.random.Generator, int], tuple[int, int, str]]:
+	# A stream that starts with idle seconds of the carrier of a 0, then noise seconds of noise, before its preamble,
+	# with noise at snr dB over all of it if given.
+	def run(rng: numpy.random.Generator, bits: int) -> tuple[int, int, str]:
+		data = random_bits(rng, bits)
+		sent = PREAMBLE + data
+		_, signal = fsk_array(FREQ0, FREQ1, BIT_DURATION * len(sent), int(RATE * BIT_DURATION) * len(sent), sent, True)
+
+		v = numpy.concatenate((
+			numpy.sin(2 * numpy.pi * FREQ0 * numpy.arange(round(idle * RATE)) / RATE),
+			rng.standard_normal(round(noise * RATE)),
+			signal
+		))
+		if snr != None:
+			v += rng.standard_normal(len(v)) * numpy.sqrt(0.5 / 10 ** (snr / 10))
+
+		return compare_bits(*stream(numpy.arange(len(v)) / RATE, v, StreamDemodulator(None, len(PREAMBLE))), data)
+
+	return run
+
+def random_capture(rng: numpy.random.Generator) -> tuple[int, numpy.ndarray, numpy.ndarray]:
+	# An FSK capture of a few bits at anything from 1 to 50 points per bit, with noise, runs of exact zeros from values
+	# rounded to a few decimals, jittered or out-of-order times, and times that do not start at 0.
+	bits = int(rng.integers(1, 65))
+	freq0, freq1 = sorted(rng.uniform(50, 5000, 2).tolist())
+	t, v = fsk_array(freq0, freq1, bits * float(rng.uniform(0.001, 0.1)), bits * int(rng.integers(1, 51)), random_bits(rng, bits), bool(rng.integers(2)))
+
+	v = numpy.round(v + rng.normal(0, float(rng.choice([0, 0.1, 0.5])), len(v)), int(rng.integers(1, 10)))
+	if rng.random() < 0.3:
+		t = t + rng.normal(0, 0.1 * (t[-1] - t[0]) / len(t), len(t))
+
+	if rng.random() < 0.1:
+		swap = rng.integers(0, len(t), 2)
+		t[swap] = t[swap[::-1]]
+
+	if rng.random() < 0.3:
+		t = t + float(rng.uniform(-1, 1))
+
+	return bits, t, v
+
+def compare_demodulate(rng: numpy.random.Generator, bits: int) -> tuple[int, int, str]:
+	# demodulate_samples is the vectorized demodulate, so on every capture it must give the same bits, or fail the same way.
+	def outcome(run: Callable[[], list[bool]]) -> list[bool] | str:
+		try:
+			return run()
+
+		except Exception as e:
+			return type(e).__name__
+
+	mismatches = 0
+	failed = 0
+	for _ in range(CAPTURES):
+		bits, t, v = random_capture(rng)
+
+		vectorized = outcome(lambda: demodulate_samples(bits, t, v))
+		mismatches += vectorized != outcome(lambda: demodulate(bits, list(zip(t.tolist(), v.tolist()))))
+		failed += isinstance(vectorized, str)
+
+	return CAPTURES, mismatches, f"captures, {failed} failing in both"
+
+def random_values(rng: numpy.random.Generator, n: int) -> numpy.ndarray:
+	# Values of any magnitude that the digit columns handle, signed zeros, and values on or next to a tie at the ninth
+	# decimal. Now and then, a value past what they handle, or not finite, so that the fallback is checked too.
+	magnitude = 10.0 ** rng.integers(-12, 6, n)
+	x = rng.uniform(-1, 1, n) * magnitude
+
+	ties = rng.random(n) < 0.2
+	x[ties] = (rng.integers(-10 ** 12, 10 ** 12, int(ties.sum())) + 0.5) / 1e9
+	x[ties] = numpy.nextafter(x[ties], rng.choice([-numpy.inf, 0, numpy.inf], int(ties.sum())))
+	x[rng.random(n) < 0.05] = rng.choice([0.0, -0.0])
+
+	if rng.random() < 0.1:
+		x[rng.integers(n)] = rng.choice([1e6, -1e7, numpy.inf, numpy.nan])
+
+	return x
+
+def compare_format(rng: numpy.random.Generator, bits: int) -> tuple[int, int, str]:
+	# format_samples builds the digits of f"{t:.9f} {v:.9f}\n" with numpy, so every line must be those same bytes.
+	lines = 0
+	mismatches = 0
+	for _ in range(FORMAT_BLOCKS):
+		n = int(rng.integers(1, 2000))
+		t = random_values(rng, n)
+		v = random_values(rng, n)
+
+		expected = [f"{tx:.9f} {vx:.9f}\n".encode() for tx, vx in zip(t.tolist(), v.tolist())]
+		formatted = format_samples(t, v).splitlines(keepends=True)
+
+		lines += n
+		mismatches += sum(a != b for a, b in zip(formatted, expected)) + abs(len(formatted) - len(expected))
+
+	return lines, mismatches, f"samples in {FORMAT_BLOCKS} blocks"
+
+
+
+CASES = [
+	Case("stream told, 80 points/bit",            stream_case(80, True, False)),
+	Case("stream learned, 80 points/bit",         stream_case(80, True, True)),
+	Case("stream learned, 80 points/bit, reset",  stream_case(80, False, True)),
+	Case("stream learned, 200 points/bit",        stream_case(200, True, True)),
+	Case("stream learned, 200 points/bit, reset", stream_case(200, False, True)),
+	Case("stream learned, sample by sample",      stream_case(80, True, True, 1)),
+	Case("stream after 60s of carrier",           lead_in_case(60, 0, None)),
+	Case("stream after 60s of noise",             lead_in_case(0, 60, None)),
+	Case("stream after carrier and noise, 10dB",  lead_in_case(20, 20, 10)),
+	Case("demodulate_samples against demodulate", compare_demodulate),
+	Case("format_samples against f-strings",      compare_format),
+]
+
+
+
+def __main__():
+	parser = argparse.ArgumentParser(description="Checks that the demodulators decode what was modulated, and agree with each other.")
+	parser.add_argument("--bits", type=int, default=2000, help="data bits per stream")
+	parser.add_argument("--seed", type=int, default=1, help="seed of the random bits and noise")
+	parser.add_argument("--cases", default="", help="comma-separated substrings of the case names to run")
+	args = parser.parse_args()
+
+	filters = [name for name in args.cases.split(",") if name != ""]
+	failures = 0
+
+	print(f"{'case':<40} {'checked':>8} {'errors':>6} {'time':>9}  detail")
+
+	for case in CASES:
+		if filters != [] and not any(name in case.name for name in filters):
+			continue
+
+		start = time.perf_counter()
+		checked, errors, detail = case.run(numpy.random.default_rng(args.seed), args.bits)
+		seconds = time.perf_counter() - start
+
+		failures += errors != 0
+
+		print(f"{case.name:<40} {checked:>8} {errors:>6} {seconds * 1e3:>7.1f}ms  {detail}", flush=True)
+
+	if failures != 0:
+		print(f"{failures} cases with errors.", file=sys.stderr)
+		sys.exit(1)
+
+
+
+if __name__ == "__main__":
+	__main__()
@@ -0,0 +1,6 @@
+# SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
+# SPDX-License-Identifier: 0BSD
+
+"""
+Signal generation, sample I/O, demodulation and circuit simulation shared by the scripts in 13/ and sp2/.
+"""
@@ -0,0 +1,215 @@
+# SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
+# SPDX-License-Identifier: 0BSD
+
+from contextlib import nullcontext
+from dataclasses import dataclass
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Iterable, Iterator
+
+import os
+import sys
+
+
+
+@dataclass
+class Transform:
+	convert : type | Callable
+	position: int
+
+@dataclass
+class Rule:
+	transforms : list[Transform]
+	find_string: str | None = None
+
+@dataclass
+class CommandSpec:
+	rules   : list[Rule]
+	callback: Callable[..., bool]
+
+
+
+# Cleared in batch mode, so that nothing but results reaches stdout.
+_prompts = True
+
+def input_list(prompt: str) -> list[str]:
+	return input(prompt if _prompts else "").split()
+
+
+
+Converter = tuple[int, type | Callable, int]
+
+@dataclass
+class CompiledRules:
+	length    : int
+	literals  : list[tuple[int, str]]
+	converters: list[Converter]
+	outputs   : int
+
+@dataclass
+class CompiledSpec:
+	order   : int
+	rules   : CompiledRules
+	callback: Callable[..., bool]
+
+# The specs of a command length that have their literals at the same positions, keyed by those literals, with the
+# function that picks the words at those positions out of a command.
+Keywords = Callable[[list[str]], Any]
+SpecGroup = tuple[Keywords, dict[Any, list[CompiledSpec]]]
+
+@dataclass
+class CommandTable:
+	specs    : list[CommandSpec]
+	by_length: dict[int, list[SpecGroup]]
+
+
+
+def compile_rules(rules: list[Rule]) -> CompiledRules:
+	literals: list[tuple[int, str]] = []
+	converters: list[Converter] = []
+
+	for index, rule in enumerate(rules):
+		if rule.find_string != None:
+			literals.append((index, rule.find_string))
+
+		for transform in rule.transforms:
+			converters.append((index, transform.convert, transform.position))
+
+	return CompiledRules(len(rules), literals, converters, len(converters))
+
+def convert_compiled(compiled: CompiledRules, command: list[str]) -> list[Any] | None:
+	# Converts the arguments of a command whose length and literals are already known to match.
+	parsed: list[Any] = [None] * compiled.outputs
+
+	try:
+		for index, convert, position in compiled.converters:
+			parsed[position] = convert(command[index])
+
+	except:
+		return None
+
+	return parsed
+
+def parse_compiled(compiled: CompiledRules, command: list[str]) -> list[Any] | None:
+	if len(command) != compiled.length:
+		return None
+
+	for index, literal in compiled.literals:
+		if command[index] != literal:
+			return None
+
+	return convert_compiled(compiled, command)
+
+def compile_commandspecs(specs: list[CommandSpec]) -> CommandTable:
+	# Specs are grouped by their argument count, then by where their literal keywords are, and then by the keywords
+	# themselves, so that a command only reaches the specs it could match, with their literals already checked.
+	by_length: dict[int, dict[tuple[int, ...], dict[Any, list[CompiledSpec]]]] = {}
+
+	for order, spec in enumerate(specs):
+		compiled = compile_rules(spec.rules)
+		positions = tuple(index for index, _ in compiled.literals)
+		literals = tuple(literal for _, literal in compiled.literals)
+
+		by_positions = by_length.setdefault(compiled.length, {})
+		by_literals = by_positions.setdefault(positions, {})
+		by_literals.setdefault(literals[0] if len(literals) == 1 else literals or None, []).append(
+			CompiledSpec(order, compiled, spec.callback)
+		)
+
+	return CommandTable(
+		specs,
+		{
+			length: [(itemgetter(*positions) if positions else lambda command: None, by_literals) for positions, by_literals in by_positions.items()]
+			for length, by_positions in by_length.items()
+		}
+	)
+
+def dispatch(table: CommandTable, command: list[str], default: Callable[[], bool]) -> bool:
+	groups = table.by_length.get(len(command))
+	if groups == None:
+		return default()
+
+	# The specs still get tried in their original order, as the first one that parses wins.
+	candidates: list[CompiledSpec] = []
+	for keywords, by_literals in groups:
+		if found := by_literals.get(keywords(command)):
+			candidates = sorted(candidates + found, key=attrgetter("order")) if candidates else found
+
+	for spec in candidates:
+		if (parsed := convert_compiled(spec.rules, command)) != None:
+			return spec.callback(*parsed)
+
+	return default()
+
+
+
+def repl(run_command: Callable[[list[str]], bool]):
+	while True:
+		try:
+			if run_command(input_list("> ")) == False:
+				return
+
+		except Exception as e:
+			print(e)
+
+		print("")
+
+def job_commands(args: list[str]) -> Iterator[list[str]]:
+	# The arguments are either a single command, or -f and a job file with a command per line, where blank lines and
+	# lines starting with # are skipped. A job file of - is read from stdin.
+	if args[0] != "-f":
+		yield args
+		return
+
+	if len(args) != 2:
+		raise ValueError("Expected a single job file after -f.")
+
+	with open(args[1], "r") if args[1] != "-" else nullcontext(sys.stdin) as jobs:
+		for line in jobs:
+			command = line.split()
+			if command != [] and not command[0].startswith("#"):
+				yield command
+
+def run_batch(table: CommandTable, commands: Iterable[list[str]]) -> int:
+	# Runs the commands without prompts, stopping at the first one that fails, and returns the exit code: 0 if they all
+	# ran, 1 if one raised an error, and 2 if one was not a valid command. Errors go to stderr.
+	global _prompts
+	_prompts = False
+
+	try:
+		for command in commands:
+			result = dispatch(table, command, lambda: None)
+
+			if result == None:
+				print(f"Invalid command: {' '.join(command)}", file=sys.stderr)
+				return 2
+
+			if result == False:
+				break
+
+		sys.stdout.flush()
+
+	except BrokenPipeError:
+		# The reader of stdout went away, so whatever is left to write is dropped.
+		os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+		return 1
+
+	except Exception as e:
+		print(e, file=sys.stderr)
+		return 1
+
+	return 0
+
+
+
+# The arguments shared by the tools live here rather than with the numpy code that uses them, so that parsing them
+# does not import numpy.
+SAMPLE_RULES = compile_rules([Rule([Transform(float, 0)]), Rule([Transform(float, 1)])])
+
+def symbol_map(s: str) -> list[float]:
+	levels = [float(level) for level in s.split(",")]
+
+	if len(levels) >= 2 and len(levels) & (len(levels) - 1) == 0:
+		return levels
+
+	else:
+		raise ValueError("The given string is not a symbol map with a power of two levels.")
@@ -0,0 +1,76 @@
+# SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
+# SPDX-License-Identifier: 0BSD
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+# Only chunked counting needs numpy, so it imports it itself, and a counter fed one prompted sample at a time can be
+# used without waiting for it.
+if TYPE_CHECKING:
+	import numpy
+
+	from .signal import Signal
+
+
+
+@dataclass
+class CrossingCounter:
+	crossings: int = 0
+	last     : float = 0.0
+
+	# Only the last nonzero sample is kept, so chunks of any size can be fed in one after another.
+	def add(self, v: float):
+		if v != 0:
+			if self.last * v < 0:
+				self.crossings += 1
+
+			self.last = v
+
+	def add_chunk(self, v: "numpy.ndarray | Signal"):
+		import numpy
+
+		from .signal import Signal
+
+		if isinstance(v, Signal):
+			v = v.values
+
+		no_zeroes = v[v != 0]
+
+		if len(no_zeroes) != 0:
+			self.crossings += int(self.last * no_zeroes[0] < 0)
+			self.crossings += int(numpy.count_nonzero(no_zeroes[1:] * no_zeroes[:-1] < 0))
+
+			self.last = float(no_zeroes[-1])
+
+
+
+def count_crossings(tv: Iterable[tuple[float, float]]) -> int:
+	counter = CrossingCounter()
+
+	for _, v in tv:
+		counter.add(v)
+
+	return counter.crossings
+
+def count_value_crossings(chunks: Iterable["numpy.ndarray | Signal"]) -> tuple[int, int]:
+	counter = CrossingCounter()
+	samples = 0
+
+	for v in chunks:
+		counter.add_chunk(v)
+		samples += len(v)
+
+	return counter.crossings, samples
+
+def value_chunks(filename: str) -> Iterator["numpy.ndarray"]:
+	from .sampleio import BLOCK_LINES, is_binary, read_samples, read_text_samples
+
+	if is_binary(filename):
+		t, v = read_samples(filename)
+
+		for begin in range(0, len(v), BLOCK_LINES):
+			yield v[begin:begin + BLOCK_LINES]
+
+	else:
+		for tv in read_text_samples(filename):
+			yield tv[:, 1]
@@ -0,0 +1,469 @@
+# SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
+# SPDX-License-Identifier: 0BSD
+
+from dataclasses import dataclass, field
+from itertools import pairwise
+
+import math
+import os
+import time
+
+import numpy
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .commands import Rule, Transform, compile_rules, parse_compiled
+from .keying import MODULATIONS
+from .sampleio import read_signal
+from .signal import Signal, as_arrays
+
+
+
+def demodulate(bits: int, tv: list[tuple[float, float]]) -> list[bool]:
+	sequence: list[bool] = []
+
+	no_zeroes = [xy for xy in tv if xy[1] != 0]
+
+	duration = no_zeroes[-1][0]
+	bit_duration = duration / bits
+
+	crossings: list[int] = [0] * bits
+	bit = 0
+	for x, y in pairwise(no_zeroes):
+		if x[0] > bit_duration * (bit + 1) and bit < bits - 1:
+			bit += 1
+
+		if x[1] * y[1] < 0:
+			crossings[bit] += 1
+
+	frequencies = [(c / 2) / bit_duration for c in crossings]
+	threshold = sum(frequencies) / len(frequencies)
+	for f in frequencies:
+		if f > threshold:
+			sequence.append(True)
+
+		else:
+			sequence.append(False)
+
+	return sequence
+
+def demodulate_samples(bits: int, t: numpy.ndarray | Signal, v: numpy.ndarray | None = None) -> list[bool]:
+	t, v = as_arrays(t, v)
+
+	keep = v != 0
+	t = t[keep]
+	v = v[keep]
+
+	duration = float(t[-1])
+	bit_duration = duration / bits
+
+	# The bit index of each sample pair, as the loop in demodulate would find it. That loop moves at most one bit
+	# per pair, so a sample past several bit boundaries lags behind its window until the next ones catch it up.
+	# Unsorted times have no such closed form, so they go through the loop itself.
+	times = t[:-1]
+	if not (bit_duration > 0 and numpy.all(times[1:] >= times[:-1])):
+		return demodulate(bits, zip(t.tolist(), v.tolist()))
+
+	window = numpy.searchsorted(bit_duration * numpy.arange(1, bits), times, "left")
+	index = numpy.arange(len(times))
+	bit = numpy.minimum(numpy.minimum.accumulate(window - index) + index, index + 1)
+
+	crossings = numpy.bincount(bit[v[1:] * v[:-1] < 0], minlength=bits)
+
+	frequencies = ((crossings / 2) / bit_duration).tolist()
+	threshold = sum(frequencies) / len(frequencies)
+
+	return [f > threshold for f in frequencies]
+
+def symbol_windows(symbols: int, t: numpy.ndarray) -> numpy.ndarray:
+	if len(t) < 2:
+		raise ValueError("Tone detection needs at least two samples.")
+
+	# Every sample stands for the interval up to the next one, so the capture lasts one step past its last sample, and
+	# a sample on a symbol boundary is given to the later symbol even after rounding.
+	step = (t[-1] - t[0]) / (len(t) - 1)
+	symbol_duration = (t[-1] - t[0] + step) / symbols
+
+	return numpy.clip((t - t[0] + step / 2) // symbol_duration, 0, symbols - 1).astype(int)
+
+def window_correlation(window: numpy.ndarray, symbols: int, t: numpy.ndarray, v: numpy.ndarray, frequency: float) -> numpy.ndarray:
+	# The signal correlated with a tone over each symbol, which is what a Goertzel filter at that frequency computes,
+	# but for all symbols at once.
+	phase = (2 * numpy.pi * frequency) * t
+	real = numpy.bincount(window, v * numpy.cos(phase), symbols)
+	imag = numpy.bincount(window, v * numpy.sin(phase), symbols)
+
+	return real - 1j * imag
+
+def tone_demodulate(bits: int, t: numpy.ndarray | Signal, v: numpy.ndarray | None, freq0: float, freq1: float) -> list[bool]:
+	t, v = as_arrays(t, v)
+
+	window = symbol_windows(bits, t)
+
+	# Each bit goes to the tone with more energy in it.
+	energies: list[numpy.ndarray] = []
+	for f in (freq0, freq1):
+		correlation = window_correlation(window, bits, t, v, f)
+		energies.append(correlation.real * correlation.real + correlation.imag * correlation.imag)
+
+	return (energies[1] > energies[0]).tolist()
+
+def keying_demodulate(modulation: str, bits: int, t: numpy.ndarray | Signal, v: numpy.ndarray | None, carrier: float, levels: list[float]) -> list[bool]:
+	t, v = as_arrays(t, v)
+
+	width = len(levels).bit_length() - 1
+	if bits % width != 0:
+		raise ValueError(f"The bits do not split into {width}-bit symbols.")
+
+	symbols = bits // width
+	window = symbol_windows(symbols, t)
+
+	# M-FSK symbols go to their strongest tone, ASK symbols to the nearest amplitude, and PSK symbols to the nearest
+	# phase, measured against the carrier from t = 0.
+	if modulation == "mfsk":
+		index = numpy.argmax([numpy.abs(window_correlation(window, symbols, t, v, f)) for f in levels], axis=0)
+
+	elif modulation == "ask":
+		samples = numpy.maximum(numpy.bincount(window, minlength=symbols), 1)
+		amplitudes = 2 * numpy.abs(window_correlation(window, symbols, t, v, carrier)) / samples
+		index = numpy.argmin(numpy.abs(amplitudes[:, None] - numpy.array(levels)), axis=1)
+
+	elif modulation == "psk":
+		phases = numpy.angle(1j * window_correlation(window, symbols, t, v, carrier))
+		index = numpy.argmin(numpy.abs(numpy.angle(numpy.exp(1j * (phases[:, None] - numpy.radians(levels))))), axis=1)
+
+	else:
+		raise ValueError(f"Unknown modulation {modulation}, expected one of {', '.join(MODULATIONS)}.")
+
+	return ((index[:, None] >> numpy.arange(width - 1, -1, -1)) & 1).ravel().astype(bool).tolist()
+
+def keying_efficiency(modulation: str, bits: int, t: numpy.ndarray | Signal, carrier: float, levels: list[float]) -> tuple[float, float]:
+	# The bit rate, and the bandwidth as the main lobe of the spectrum, which for M-FSK also spans all of its tones.
+	t, _ = as_arrays(t)
+	duration = (t[-1] - t[0]) * len(t) / (len(t) - 1)
+	symbol_rate = bits / (len(levels).bit_length() - 1) / duration
+
+	bandwidth = 2 * symbol_rate
+	if modulation == "mfsk":
+		bandwidth += max(levels) - min(levels)
+
+	return bits / duration, bandwidth
+
+
+
+# How far the next window moves towards a tone change seen at the start of a window, as a fraction of its distance, and
+# how much the bit duration changes by, so that the windows keep following the bits of a stream however long it runs.
+PHASE_GAIN = 0.25
+RATE_GAIN = 0.02
+
+# The crossings kept while looking for a preamble: those since this many preambles' worth of tone changes, or, before
+# there are two tones, this many of the last ones, which is more than a bit of either tone usually holds. They are added
+# this many at a time.
+LEARN_PREAMBLES = 3
+LEARN_TAIL = 64
+LEARN_SLICE = 256
+
+def tone_clusters(periods: numpy.ndarray) -> tuple[float, float] | None:
+	# The cycle lengths of two tones, as the medians of the two clusters of periods rather than the extremes, which are
+	# the most jittered cycles. The clusters are split where the log periods on either side are furthest apart for how
+	# many there are, so that neither a tone making many times the cycles of the other nor a few stray cycles move the
+	# split into one of them. None if there are not two distinct tones.
+	if len(periods) < 3 or not periods.min() > 0:
+		return None
+
+	logs = numpy.sort(numpy.log(periods))
+	below = numpy.arange(1, len(logs))
+	sums = numpy.cumsum(logs)[:-1]
+	apart = sums / below - (sums[-1] + logs[-1] - sums) / (len(logs) - below)
+	split = int(numpy.argmax(below * (len(logs) - below) * apart ** 2)) + 1
+
+	low = float(numpy.exp(numpy.median(logs[:split])))
+	high = float(numpy.exp(numpy.median(logs[split:])))
+
+	return (low, high) if high > 1.25 * low else None
+
+@dataclass
+class StreamDemodulator:
+	bit_duration: float | None = None
+	preamble    : int          = 0
+	threshold   : float | None = None
+	start       : float | None = None
+
+	window : int           = 0
+	bit    : bool | None   = None
+	recent : numpy.ndarray = field(default_factory=lambda: numpy.empty(0))
+	last   : float         = 0.0
+	last_t : float         = 0.0
+	lowest : float         = math.inf
+	highest: float         = -math.inf
+	learned: list[float]   = field(default_factory=list)
+
+	def __post_init__(self):
+		if self.bit_duration == None and self.preamble < 3:
+			raise ValueError("Learning the bit duration needs a preamble of at least 3 bits.")
+
+		if self.bit_duration != None and not self.bit_duration > 0:
+			raise ValueError("The bit duration must be positive.")
+
+	# Bits are returned as soon as a later sample closes their window. start is where the current window begins, and
+	# only the crossings since the previous one began are kept.
+	def add(self, t: float, v: float) -> list[bool]:
+		return self.add_chunk(numpy.array([t]), numpy.array([v]))
+
+	def add_chunk(self, t: numpy.ndarray | Signal, v: numpy.ndarray | None = None) -> list[bool]:
+		t, v = as_arrays(t, v)
+
+		if self.start == None and len(t) != 0:
+			self.start = float(t[0])
+
+		keep = v != 0
+		t = t[keep]
+		v = v[keep]
+
+		if len(v) == 0:
+			return []
+
+		# A crossing is where the line between the samples on either side of it crosses zero, so that its time is not
+		# rounded to the sample grid.
+		previous_t = numpy.concatenate(([self.last_t], t[:-1]))
+		previous = numpy.concatenate(([self.last], v[:-1]))
+		change = v * previous < 0
+
+		before = previous[change]
+		times = previous_t[change] + (t[change] - previous_t[change]) * (before / (before - v[change]))
+
+		self.last = float(v[-1])
+		self.last_t = float(t[-1])
+
+		if self.bit_duration == None:
+			return self.learn(times)
+
+		return self.advance(times)
+
+	def flush(self) -> list[bool]:
+		# The last window only makes a bit if the stream ended at least halfway through it.
+		if self.bit_duration == None or self.start == None or self.last_t - self.start < 0.5 * self.bit_duration:
+			return []
+
+		bit = self.decide(self.window, int(numpy.count_nonzero(self.recent > self.start)))
+		self.window += 1
+		self.start += self.bit_duration
+		self.recent = self.recent[self.recent > self.start - self.bit_duration]
+
+		return [bit] if bit != None else []
+
+	def advance(self, times: numpy.ndarray) -> list[bool]:
+		crossings = numpy.concatenate((self.recent, times))
+
+		bits: list[bool] = []
+		while self.last_t > self.start + self.bit_duration:
+			end = self.start + self.bit_duration
+			count = numpy.searchsorted(crossings, end, "right") - numpy.searchsorted(crossings, self.start, "right")
+
+			# Where the tone changes between two bits is where the boundary between their windows should be, so the
+			# windows move towards it, and the bit duration follows how they had to move.
+			offset = 0.0
+			if (bit := self.decide(self.window, int(count))) != None:
+				if self.bit != None and bit != self.bit:
+					offset = self.tone_change(crossings) - self.start
+
+				bits.append(bit)
+				self.bit = bit
+
+			self.window += 1
+			self.start = end + PHASE_GAIN * offset
+			self.bit_duration += RATE_GAIN * offset
+
+		self.recent = crossings[crossings > self.start - self.bit_duration]
+
+		return bits
+
+	def tone_change(self, crossings: numpy.ndarray) -> float:
+		# The time of the tone change closest to the start of the current window, from the crossings within half a window
+		# of it. With continuous phase, the m gaps between the first and the last of them are (change - first) / before +
+		# (last - change) / after, for the gap lengths before and after of the two tones, as measured in either window.
+		def between(begin: float, end: float) -> numpy.ndarray:
+			return crossings[numpy.searchsorted(crossings, begin, "right"):numpy.searchsorted(crossings, end, "right")]
+
+		previous = numpy.diff(between(self.start - self.bit_duration, self.start))
+		current = numpy.diff(between(self.start, self.start + self.bit_duration))
+		near = between(self.start - self.bit_duration / 2, self.start + self.bit_duration / 2)
+		if len(previous) < 2 or len(current) < 2 or len(near) < 3:
+			return self.start
+
+		before = float(numpy.median(previous))
+		after = float(numpy.median(current))
+		if not max(before, after) > 1.25 * min(before, after):
+			return self.start
+
+		change = near[0] + (len(near) - 1 - (near[-1] - near[0]) / after) / (1 / before - 1 / after)
+
+		return float(min(max(change, near[0]), near[-1]))
+
+	def decide(self, window: int, crossings: int) -> bool | None:
+		frequency = (crossings / 2) / self.bit_duration
+
+		# Preamble windows only calibrate the threshold, unless it was learned with the bit duration or given.
+		if window < self.preamble:
+			self.learned.append(frequency)
+
+			if window == self.preamble - 1 and self.threshold == None:
+				self.threshold = sum(self.learned) / len(self.learned)
+
+			return None
+
+		if self.threshold != None:
+			return frequency > self.threshold
+
+		self.lowest = min(self.lowest, frequency)
+		self.highest = max(self.highest, frequency)
+
+		return frequency > (self.lowest + self.highest) / 2
+
+	def learn(self, times: numpy.ndarray) -> list[bool]:
+		# The preamble alternates between the two tones, so its cycles alternate between two lengths, and the bit
+		# boundaries are where they switch. Until one is found, the buffer slides over the last few preambles' worth of
+		# crossings, so an idle carrier or noise before it takes neither more memory nor more time per chunk. The crossings
+		# of a chunk are added a slice at a time for the same reason, so that a long chunk of noise does not drown the
+		# preamble after it.
+		for begin in range(0, len(times), LEARN_SLICE):
+			self.learned.extend(times[begin:begin + LEARN_SLICE].tolist())
+
+			if self.search():
+				return self.advance(times[begin + LEARN_SLICE:])
+
+		return []
+
+	def search(self) -> bool:
+		# Cycles rather than gaps are compared, as any error in the time of a crossing cancels over the two gaps of a cycle.
+		crossings = numpy.array(self.learned)
+		periods = crossings[2:] - crossings[:-2]
+
+		# The tones are told apart by the cycles within a fifth of the length of the two on either side of them, as noise
+		# makes cycles of every length that would otherwise pull them apart, but hardly ever five alike in a row.
+		clusters = None
+		if len(periods) >= 7:
+			around = sliding_window_view(numpy.pad(periods, 2, "edge"), 5)
+			clusters = tone_clusters(periods[around.max(axis=1) <= 1.2 * around.min(axis=1)])
+
+		if clusters == None:
+			# A single tone is either not the preamble or only its first bit, of which only the end is needed.
+			del self.learned[:-LEARN_TAIL]
+			return False
+
+		low, high = clusters
+		short = periods < math.sqrt(low * high)
+
+		# Up to three cycles of the other length inside a bit are jitter, or a noise crossing splitting a cycle, not a
+		# boundary. The last three cycles have no later neighbours to tell, so they wait for the next samples.
+		short[3:-3] = sliding_window_view(short, 7).sum(axis=1) >= 4
+		changes = numpy.flatnonzero(short[1:-3] != short[:-4]) + 1
+
+		# The boundaries are the first preamble - 1 changes between which every bit holds as many crossings as its tone
+		# makes in one bit duration, after a first bit at least almost as long, unless it began before the buffer did.
+		# Jitter alone makes runs of a cycle or two, so a bit must also hold a few crossings, and noise makes cycles of
+		# every length, so most cycles of the first bit and of the rest must also be within a tenth of their tone.
+		tones = numpy.where(short, low, high)
+
+		def purity(part: slice) -> float:
+			return float(numpy.median(numpy.abs(periods[part] / tones[part] - 1)))
+
+		found = None
+		if len(changes) >= self.preamble - 1:
+			windows = sliding_window_view(changes, self.preamble - 1)
+			before = numpy.concatenate(([0], changes))[:len(windows)]
+
+			# Each boundary is off by up to a gap, so the bit duration is the slope of the line through all of them.
+			bits = numpy.arange(1, self.preamble) - self.preamble / 2
+			boundaries = crossings[windows]
+			durations = boundaries @ bits / (bits @ bits)
+			starts = boundaries.mean(axis=1) - durations * self.preamble / 2
+
+			runs = numpy.diff(numpy.column_stack((before, windows)))
+			expected = 2 * durations[:, None] / tones[numpy.column_stack((before, windows[:, :-1]))]
+			bounded = numpy.all(numpy.abs(runs[:, 1:] - expected[:, 1:]) <= 0.25 * expected[:, 1:] + 1, axis=1)
+			first = (before == 0) | (runs[:, 0] >= 0.75 * expected[:, 0] - 1)
+
+			for index in numpy.flatnonzero(bounded & first & (expected.min(axis=1) >= 4)).tolist():
+				begin = max(int(before[index]), int(windows[index, 0] - expected[index, 0]))
+				leading = slice(begin, int(windows[index, 0]))
+				segment = slice(int(windows[index, 0]), int(windows[index, -1]))
+				if purity(leading) <= 0.1 and purity(segment) <= 0.1:
+					found = index
+					break
+
+		if found == None:
+			# Preambles starting at older changes were already ruled out, and a last run too long to follow the one before
+			# it in a preamble is at most its first bit, of which only the end is needed, like a single tone.
+			lengths = numpy.diff(numpy.concatenate(([0], changes, [len(periods)])))
+			if lengths[-1] > 2 * high / low * (lengths[-2] if len(lengths) > 1 else 0) + LEARN_TAIL:
+				del self.learned[:-LEARN_TAIL]
+
+			elif len(changes) > LEARN_PREAMBLES * self.preamble:
+				del self.learned[:changes[-LEARN_PREAMBLES * self.preamble] - 1]
+
+			return False
+
+		bit_duration = float(durations[found])
+		start = float(starts[found])
+
+		# The tones are measured again over the preamble alone, as whatever came before it shifted the clusters.
+		segment = slice(begin, int(windows[found, -1]))
+		low = float(numpy.median(periods[segment][short[segment]]))
+		high = float(numpy.median(periods[segment][~short[segment]]))
+
+		self.bit_duration = bit_duration
+
+		if self.threshold == None:
+			self.threshold = (1 / low + 1 / high) / 2
+
+		# The last preamble bit is still arriving, so the windows carry on from it rather than from the first data bit.
+		self.window = self.preamble - 1
+		self.start = start + self.window * bit_duration
+		self.recent = crossings[crossings > self.start - bit_duration]
+		self.learned = []
+
+		return True
+
+
+
+MANIFEST_RULES = compile_rules([Rule([Transform(str, 0)]), Rule([Transform(int, 1)])])
+
+def batch_jobs(path: str, bits: int | None = None) -> list[tuple[str, int]]:
+	if os.path.isdir(path):
+		if bits == None:
+			raise ValueError("A directory of captures needs a bit count.")
+
+		return [
+			(filename, bits)
+			for name in sorted(os.listdir(path))
+			if os.path.isfile(filename := os.path.join(path, name))
+		]
+
+	if bits != None:
+		raise ValueError("A manifest lists its own bit counts.")
+
+	# Every nonempty manifest line is "<filename> <bits>", with the filename relative to the manifest.
+	jobs: list[tuple[str, int]] = []
+	with open(path, "r") as manifest:
+		for number, line in enumerate(manifest, 1):
+			if line.split() == []:
+				continue
+
+			if (parsed := parse_compiled(MANIFEST_RULES, line.split())) == None:
+				raise ValueError(f"Invalid manifest line {number}: {line.strip()}")
+
+			jobs.append((os.path.join(os.path.dirname(path), parsed[0]), parsed[1]))
+
+	return jobs
+
+def demodulate_capture(filename: str, bits: int) -> tuple[str, int, float]:
+	start = time.perf_counter()
+
+	try:
+		t, v = read_signal(filename)
+		sequence = "".join("1" if bit else "0" for bit in demodulate_samples(bits, t, v))
+
+	except Exception as e:
+		return f"error: {e}", 0, time.perf_counter() - start
+
+	return sequence, len(t), time.perf_counter() - start
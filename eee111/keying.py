@@ -0,0 +1,161 @@
+# SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
+# SPDX-License-Identifier: 0BSD
+
+from typing import Iterator
+
+import math
+
+import numpy
+
+from .signal import Signal
+from .waveform import CHUNK_POINTS, oscillate
+
+
+
+def keying_rows(duration: float, points: int, frequencies: numpy.ndarray, continuous: bool = False) -> tuple[float, numpy.ndarray]:
+	# The sample step and the time shift of every symbol, with the shifts of the original list-based FSK generator. A
+	# continuous signal instead shifts each symbol so that its phase starts where the previous symbol ended.
+	n = len(frequencies)
+	symbol_points = points // n
+	if symbol_points == 0:
+		raise ValueError("There must be at least as many points as symbols.")
+
+	step = duration / (n * symbol_points)
+	bounds = step * (symbol_points * numpy.arange(n + 1))
+	starts = bounds[:-1]
+
+	if continuous:
+		cycles = numpy.concatenate(([0.0], numpy.cumsum(frequencies * (bounds[1:] - starts))[:-1]))
+		shifts = numpy.divide(cycles, frequencies, out=numpy.zeros(n), where=frequencies != 0) - starts
+
+	else:
+		shifts = (starts - bounds[1:]) * numpy.arange(n)
+
+	return step, shifts
+
+def keying_times(step: float, symbol_points: int, first: int, last: int, out: numpy.ndarray | None = None) -> numpy.ndarray:
+	# The times of the symbols first to last, one symbol per row. Sample j is at step * j, as in Signal(0, step, ...),
+	# so the symbols start exactly on their boundaries however many there are.
+	index = numpy.add.outer(symbol_points * numpy.arange(first, last), numpy.arange(symbol_points), out=out)
+	return numpy.multiply(index, step, out=out)
+
+def keying_phases(step: float, symbol_points: int, shifts: numpy.ndarray, frequencies: numpy.ndarray, phases: numpy.ndarray | None = None) -> tuple[numpy.ndarray, numpy.ndarray]:
+	# The phase of the first sample of every symbol, and how much it grows by per sample, so that sample k of symbol i
+	# is sin(starts[i] + increments[i] * k) = sin(2 pi frequency (t + shift) + phase).
+	omega = 2 * math.pi * frequencies
+	starts = omega * (step * (symbol_points * numpy.arange(len(frequencies))) + shifts)
+
+	if phases is not None:
+		starts += phases
+
+	return starts, omega * step
+
+def keying_signal(duration: float, points: int, frequencies: numpy.ndarray, amplitudes: numpy.ndarray | None = None, phases: numpy.ndarray | None = None, continuous: bool = False) -> Signal:
+	step, shifts = keying_rows(duration, points, frequencies, continuous)
+
+	n = len(frequencies)
+	symbol_points = points // n
+	starts, increments = keying_phases(step, symbol_points, shifts, frequencies, phases)
+
+	values = numpy.empty(n * symbol_points + 1)
+	oscillate(values[:-1].reshape(n, symbol_points), starts, increments, 0, amplitudes)
+	values[-1] = keying_last(starts, increments, symbol_points, amplitudes, continuous)
+
+	return Signal(0.0, step, values)
+
+def keying_array(duration: float, points: int, frequencies: numpy.ndarray, amplitudes: numpy.ndarray | None = None, phases: numpy.ndarray | None = None, continuous: bool = False) -> tuple[numpy.ndarray, numpy.ndarray]:
+	return keying_signal(duration, points, frequencies, amplitudes, phases, continuous).time_value()
+
+def keying_chunks(duration: float, points: int, frequencies: numpy.ndarray, amplitudes: numpy.ndarray | None = None, phases: numpy.ndarray | None = None, continuous: bool = False, chunk: int = CHUNK_POINTS) -> Iterator[tuple[numpy.ndarray, numpy.ndarray]]:
+	# Yields the same samples as keying_array, a chunk at a time. Whole symbols are computed as the rows of a matrix,
+	# unless a single symbol is longer than a chunk, in which case each symbol is split into chunks.
+	step, shifts = keying_rows(duration, points, frequencies, continuous)
+
+	n = len(frequencies)
+	symbol_points = points // n
+	starts, increments = keying_phases(step, symbol_points, shifts, frequencies, phases)
+
+	if symbol_points <= chunk:
+		rows = chunk // symbol_points
+		for first in range(0, n, rows):
+			last = min(first + rows, n)
+
+			t = keying_times(step, symbol_points, first, last)
+			v = numpy.empty_like(t)
+			oscillate(v, starts[first:last], increments[first:last], 0, None if amplitudes is None else amplitudes[first:last])
+
+			yield t.ravel(), v.ravel()
+
+	else:
+		for i in range(n):
+			for begin in range(i * symbol_points, (i + 1) * symbol_points, chunk):
+				t = step * numpy.arange(begin, min(begin + chunk, (i + 1) * symbol_points))
+				v = numpy.empty_like(t)
+				oscillate(v, starts[i], increments[i], begin - i * symbol_points, None if amplitudes is None else amplitudes[i])
+
+				yield t, v
+
+	yield numpy.array([step * (n * symbol_points)]), numpy.array([keying_last(starts, increments, symbol_points, amplitudes, continuous)])
+
+def keying_last(starts: numpy.ndarray, increments: numpy.ndarray, symbol_points: int, amplitudes: numpy.ndarray | None, continuous: bool) -> float:
+	# The original generator ends on a 0, while a continuous signal carries on with its last symbol.
+	if not continuous:
+		return 0.0
+
+	v = numpy.empty(1)
+	oscillate(v, starts[-1], increments[-1], symbol_points, None if amplitudes is None else amplitudes[-1])
+
+	return float(v[0])
+
+def fsk_frequencies(frequency0: float, frequency1: float, bits: str) -> numpy.ndarray:
+	return numpy.where(numpy.frombuffer(bits.encode(), numpy.uint8) == ord("1"), frequency1, frequency0)
+
+def fsk_signal(frequency0: float, frequency1: float, duration: float, points: int, bits: str, continuous: bool = False) -> Signal:
+	return keying_signal(duration, points, fsk_frequencies(frequency0, frequency1, bits), continuous=continuous)
+
+def fsk_array(frequency0: float, frequency1: float, duration: float, points: int, bits: str, continuous: bool = False) -> tuple[numpy.ndarray, numpy.ndarray]:
+	return keying_array(duration, points, fsk_frequencies(frequency0, frequency1, bits), continuous=continuous)
+
+def fsk_chunks(frequency0: float, frequency1: float, duration: float, points: int, bits: str, continuous: bool = False, chunk: int = CHUNK_POINTS) -> Iterator[tuple[numpy.ndarray, numpy.ndarray]]:
+	return keying_chunks(duration, points, fsk_frequencies(frequency0, frequency1, bits), continuous=continuous, chunk=chunk)
+
+
+
+MODULATIONS = ("mfsk", "ask", "psk")
+
+def symbols(bits: str, levels: int) -> numpy.ndarray:
+	# Every group of log2(levels) bits, most significant first, is the index of a symbol.
+	width = levels.bit_length() - 1
+	if len(bits) % width != 0:
+		raise ValueError(f"The bitstring does not split into {width}-bit symbols.")
+
+	digits = (numpy.frombuffer(bits.encode(), numpy.uint8) - ord("0")).reshape(-1, width).astype(numpy.int64)
+
+	return digits @ (1 << numpy.arange(width - 1, -1, -1))
+
+def keying(modulation: str, carrier: float, levels: list[float], bits: str, continuous: bool = False) -> tuple[numpy.ndarray, numpy.ndarray | None, numpy.ndarray | None, bool]:
+	# The frequencies, amplitudes, phases and continuity of the symbols. The levels are frequencies for M-FSK,
+	# amplitudes for ASK and phases in degrees for PSK, in the order of the symbols they stand for. ASK and PSK are
+	# always continuous, so that every symbol keeps the phase of the carrier that their demodulators compare against.
+	values = numpy.array(levels)[symbols(bits, len(levels))]
+
+	if modulation == "mfsk":
+		return values, None, None, continuous
+
+	frequencies = numpy.full(len(values), carrier)
+	if modulation == "ask":
+		return frequencies, values, None, True
+
+	if modulation == "psk":
+		return frequencies, None, numpy.radians(values), True
+
+	raise ValueError(f"Unknown modulation {modulation}, expected one of {', '.join(MODULATIONS)}.")
+
+
+
+def bitstring(s: str) -> str:
+	if all(c in '01' for c in s):
+		return s
+
+	else:
+		raise ValueError("The given string is not a bitstring.")
@@ -0,0 +1,153 @@
+# SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
+# SPDX-License-Identifier: MPL-2.0
+
+import math
+
+import numpy
+
+
+
+DERIVATIVES = ("backward", "central")
+INTEGRALS = ("rectangle", "trapezoid", "simpson")
+
+
+
+def step(x: numpy.ndarray) -> float:
+	"""
+	Returns the spacing of evenly spaced x coordinates, of which there must be at least two.
+	"""
+	if len(x) < 2:
+		raise ValueError("At least two samples are needed for their spacing.")
+
+	return (x[-1] - x[0]) / (len(x) - 1)
+
+def derivative(x: numpy.ndarray, y: numpy.ndarray, method: str = "backward", out: numpy.ndarray | None = None, scale: float = 1.0) -> numpy.ndarray:
+	"""
+	Computes scale times the slope of y at every x coordinate, along the first axis of y, into out.
+	The x coordinates must be evenly spaced. out must not overlap y, and is allocated if not given.
+	  backward: (y[i] - y[i - 1]) / dx, with a slope of zero at the first point; first-order accurate.
+	  central:  (y[i + 1] - y[i - 1]) / 2dx, with one-sided three-point slopes at both ends; second-order accurate.
+	"""
+	y = numpy.asarray(y)
+	if out is None:
+		out = numpy.empty(y.shape)
+
+	h = step(x)
+
+	if method == "backward":
+		out[0] = 0.0
+		numpy.subtract(y[1:], y[:-1], out=out[1:])
+		out[1:] *= scale / h
+
+	elif method == "central":
+		if len(y) < 3:
+			raise ValueError("The central derivative needs at least three samples.")
+
+		numpy.subtract(y[2:], y[:-2], out=out[1:-1])
+		out[0] = 4 * y[1] - 3 * y[0] - y[2]
+		out[-1] = 3 * y[-1] - 4 * y[-2] + y[-3]
+		out *= scale / (2 * h)
+
+	else:
+		raise ValueError(f"Unknown derivative method {method!r}, expected one of {DERIVATIVES}.")
+
+	return out
+
+def integral(x: numpy.ndarray, y: numpy.ndarray, method: str = "rectangle", out: numpy.ndarray | None = None, scale: float = 1.0) -> numpy.ndarray:
+	"""
+	Computes scale times the area below y from the first x coordinate to every x coordinate, along the first axis of y,
+	into out. The x coordinates must be evenly spaced. out must not overlap y, and is allocated if not given.
+	  rectangle: adds dx * y[i] for every step; first-order accurate.
+	  trapezoid: adds dx * (y[i - 1] + y[i]) / 2 for every step; second-order accurate.
+	  simpson:   composite Simpson's rule, dx * (y[i - 2] + 4y[i - 1] + y[i]) / 3 for every pair of steps, at every even
+	             point; every odd point adds the area below the parabola through the points around it over its half of
+	             the pair, and the last one uses the parabola through the last three points; fourth-order accurate.
+	"""
+	y = numpy.asarray(y)
+	if out is None:
+		out = numpy.empty(y.shape)
+
+	h = step(x)
+	out[0] = 0.0
+
+	if method == "rectangle":
+		numpy.multiply(y[1:], scale * h, out=out[1:])
+
+	elif method == "trapezoid":
+		numpy.add(y[1:], y[:-1], out=out[1:])
+		out[1:] *= scale * h / 2
+
+	elif method == "simpson":
+		if len(y) < 3:
+			raise ValueError("Simpson's rule needs at least three samples.")
+
+		_simpson(y, out, scale * h)
+		return out
+
+	else:
+		raise ValueError(f"Unknown integral method {method!r}, expected one of {INTEGRALS}.")
+
+	numpy.cumsum(out[1:], axis=0, out=out[1:])
+	return out
+
+
+
+def _simpson(y: numpy.ndarray, out: numpy.ndarray, h: float):
+	"""
+	Fills out[1:] with the cumulative composite Simpson integral of y, whose samples are h apart.
+	"""
+	n = len(y)
+	pairs = (n - 1) // 2
+	even = out[2:2 * pairs + 1:2]
+	odd = out[1:2 * pairs:2]
+
+	# y[2k] + 4y[2k + 1] + y[2k + 2] for every pair of steps, summed up.
+	numpy.multiply(y[1:2 * pairs:2], 4, out=even)
+	even += y[:2 * pairs - 1:2]
+	even += y[2:2 * pairs + 1:2]
+	numpy.cumsum(even, axis=0, out=even)
+	even *= h / 3
+
+	# 5y[2k] + 8y[2k + 1] - y[2k + 2] over the first step of every pair, on top of the pairs before it.
+	numpy.multiply(y[1:2 * pairs:2], 8, out=odd)
+	odd += 5 * y[:2 * pairs - 1:2]
+	odd -= y[2:2 * pairs + 1:2]
+	odd *= h / 12
+	odd[1:] += even[:-1]
+
+	if n % 2 == 0:
+		out[-1] = out[-2] + (5 * y[-1] + 8 * y[-2] - y[-3]) * (h / 12)
+
+def samples_for_error(method: str, f: float, duration: float, tolerance: float, limit: int = 1 << 24) -> int:
+	"""
+	Returns the fewest samples of a cosine wave of frequency f over duration for which the derivative or integral method
+	stays within tolerance of the exact result, relative to the amplitude of the exact result.
+	"""
+	w = 2 * math.pi * f
+
+	def error(samples: int) -> float:
+		t = numpy.arange(samples) * (duration / samples)
+		cos = numpy.cos(w * t)
+		if method in DERIVATIVES:
+			return numpy.max(numpy.abs(derivative(t, cos, method) / w + numpy.sin(w * t)))
+
+		return numpy.max(numpy.abs(integral(t, cos, method) * w - numpy.sin(w * t)))
+
+	# Below a few samples per period the errors alias and stop shrinking with more samples.
+	low = max(2, math.ceil(4 * f * duration))
+	high = 2 * low
+	while error(high) > tolerance:
+		if high >= limit:
+			raise ValueError(f"{method} does not reach a relative error of {tolerance} within {limit} samples.")
+
+		low, high = high, min(2 * high, limit)
+
+	while high - low > 1:
+		middle = (low + high) // 2
+		if error(middle) > tolerance:
+			low = middle
+
+		else:
+			high = middle
+
+	return high
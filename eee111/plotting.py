@@ -0,0 +1,99 @@
+# SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
+# SPDX-License-Identifier: 0BSD
+
+from types import ModuleType
+from typing import Any
+
+import math
+
+import numpy
+
+from .signal import Signal
+
+
+
+def pyplot() -> ModuleType:
+	# Importing pyplot takes longer than starting everything else, so the tools only import it once they plot.
+	import matplotlib.pyplot
+
+	return matplotlib.pyplot
+
+def minmax_indices(v: numpy.ndarray, buckets: int) -> numpy.ndarray:
+	# The indices of the lowest and highest value in each of about buckets equal runs of v, in order, and of the first
+	# and last value, so that a line through them has every peak of v and spans all of it.
+	n = len(v)
+	if n <= 2 * buckets + 2:
+		return numpy.arange(n)
+
+	size = math.ceil(n / buckets)
+	full = n // size * size
+
+	rows = v[:full].reshape(-1, size)
+	starts = numpy.arange(0, full, size)
+	lows = rows.argmin(axis=1) + starts
+	highs = rows.argmax(axis=1) + starts
+
+	indices = [[0], numpy.column_stack((numpy.minimum(lows, highs), numpy.maximum(lows, highs))).ravel()]
+	if full != n:
+		tail = sorted((full + int(v[full:].argmin()), full + int(v[full:].argmax())))
+		indices.append(tail)
+
+	indices.append([n - 1])
+
+	return numpy.concatenate(indices)
+
+class DecimatedLine:
+	# A line that only holds about two points per pixel column of its axis, picked from the part of the data in view,
+	# and picked again whenever the view changes or the figure is resized. Signals are picked from without computing
+	# the times of the samples that are left out.
+	def __init__(self, axis: Any, t: numpy.ndarray | Signal, v: numpy.ndarray | None = None, **kwargs: Any):
+		self.axis = axis
+		self.signal = t if isinstance(t, Signal) else None
+
+		if self.signal != None:
+			self.v = self.signal.values
+
+		else:
+			self.t = numpy.asarray(t, dtype=float)
+			self.v = numpy.asarray(v)
+
+			# Unsorted x values, like those of a scatter, have no part in view to pick from, so they are all kept.
+			self.sorted = len(self.t) < 2 or bool(numpy.all(self.t[1:] >= self.t[:-1]))
+
+		self.line, = axis.plot(*self.visible(-math.inf, math.inf), **kwargs)
+
+		# Matplotlib only keeps weak references to bound methods, so the callbacks are closures that keep this alive.
+		axis.callbacks.connect("xlim_changed", lambda axis: self.update())
+		axis.figure.canvas.mpl_connect("resize_event", lambda event: self.update())
+
+	def visible(self, low: float, high: float) -> tuple[numpy.ndarray, numpy.ndarray]:
+		n = len(self.v)
+		begin, end = 0, n
+
+		if self.signal != None:
+			first = self.signal.start + self.signal.step * self.signal.offset
+			step = self.signal.step * self.signal.stride
+
+			if step > 0 and math.isfinite(low) and math.isfinite(high):
+				begin = min(max(math.floor((low - first) / step), 0), n)
+				end = min(max(math.ceil((high - first) / step) + 1, begin), n)
+
+			index = begin + minmax_indices(self.v[begin:end], self.buckets())
+			return self.signal.start + self.signal.step * (self.signal.offset + self.signal.stride * index), self.v[index]
+
+		# One sample past each edge is kept, so that the line runs off the sides of the view.
+		if self.sorted:
+			begin = max(int(numpy.searchsorted(self.t, low, "left")) - 1, 0)
+			end = min(int(numpy.searchsorted(self.t, high, "right")) + 1, n)
+
+		index = begin + minmax_indices(self.v[begin:end], self.buckets())
+		return self.t[index], self.v[index]
+
+	def buckets(self) -> int:
+		return max(int(self.axis.bbox.width), 1)
+
+	def update(self):
+		self.line.set_data(*self.visible(*self.axis.get_xlim()))
+
+def plot_decimated(axis: Any, t: numpy.ndarray | Signal, v: numpy.ndarray | None = None, **kwargs: Any) -> DecimatedLine:
+	return DecimatedLine(axis, t, v, **kwargs)
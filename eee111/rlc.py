@@ -0,0 +1,346 @@
+# SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
+# SPDX-License-Identifier: MPL-2.0
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby, islice, product
+from typing import Callable, Iterable, Iterator, NamedTuple
+
+import cmath
+import math
+import os
+import sys
+
+import numpy
+
+from . import numerics
+
+
+
+def factor(l: numpy.ndarray, a: float) -> numpy.ndarray:
+	"""
+	Multiplies all elements in the array by a factor a.
+	"""
+	return a * numpy.asarray(l, dtype=float)
+
+def add(a: numpy.ndarray, b: numpy.ndarray) -> numpy.ndarray:
+	"""
+	Returns the element-wise sums of a and b, which must have the same length.
+	"""
+	if len(a) != len(b):
+		raise ValueError("The arrays must have the same length.")
+
+	return numpy.add(a, b)
+
+def cos_samples(t: numpy.ndarray, a: float, f: float) -> numpy.ndarray:
+	"""
+	Generates a cosine wave with an array of timepoints, an amplitude, and a frequency.
+	Unlike wavecache.cos_wave, the timepoints are given as they are rather than as a cached grid.
+	"""
+	return a * numpy.cos(2 * math.pi * f * numpy.asarray(t, dtype=float))
+
+
+
+def peak_to_peak(t: numpy.ndarray, a: float, f: float, r: float, l: float, c: float) -> float:
+	"""
+	Simulates the series RLC circuit at a single frequency and returns the Vpp across its input.
+	The timepoints must be evenly spaced, as generated by frange.
+	"""
+	t = numpy.asarray(t, dtype=float)
+	cos = cos_samples(t, a, f)
+	vr = factor(cos, r)
+	vl = numerics.derivative(t, cos, scale=l)
+	vc = numerics.integral(t, cos, scale=1 / c)
+	vs = add(add(vr, vl), vc)
+	return float(vs.max() - vs.min())
+
+def sweep_voltages(t: list[float], a: float, f: list[float], r: float, l: float, c: float, derivative_method: str = "backward", integral_method: str = "rectangle") -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+	"""
+	Simulates the series RLC circuit at every frequency at once, returning the (frequency x time) matrices of V_R, V_L, V_C and V_S.
+	The timepoints must be evenly spaced, as generated by frange. V_L and V_C are computed with the given numerics methods.
+	"""
+	t = numpy.asarray(t, dtype=float)
+	f = numpy.asarray(f, dtype=float)
+
+	vr, vl, vc, vs = (numpy.empty((len(t), len(f))) for _ in range(4))
+	_simulate(t, a, f, r, l, c, derivative_method, integral_method, vr, vl, vc, vs)
+
+	return vr.T, vl.T, vc.T, vs.T
+
+def sweep_peak_to_peak(t: list[float], a: float, f: list[float], r: float, l: float, c: float, chunk: int = 128, derivative_method: str = "backward", integral_method: str = "rectangle") -> numpy.ndarray:
+	"""
+	Returns the Vpp across the series RLC circuit for every frequency in f. With the default methods, this matches
+	peak_to_peak to about 1e-12; the higher-order methods reach the same accuracy with far fewer timepoints.
+	Frequencies are simulated in chunks that reuse the same working buffers, so that memory use stays small.
+	"""
+	t = numpy.asarray(t, dtype=float)
+	f = numpy.asarray(f, dtype=float)
+
+	vpp = numpy.empty(len(f))
+	buffers = [numpy.empty((len(t), min(chunk, len(f)))) for _ in range(4)]
+	for i in range(0, len(f), chunk):
+		columns = len(f[i:i + chunk])
+		vr, vl, vc, vs = (b[:, :columns] for b in buffers)
+		_simulate(t, a, f[i:i + chunk], r, l, c, derivative_method, integral_method, vr, vl, vc, vs)
+		numpy.subtract(vs.max(axis=0), vs.min(axis=0), out=vpp[i:i + columns])
+
+	return vpp
+
+def _cos_matrix(t: numpy.ndarray, a: float, f: numpy.ndarray, out: numpy.ndarray, work: numpy.ndarray):
+	"""
+	Fills out with a * cos(2 pi f t) for every (time, frequency) pair, using work as scratch space.
+	The time axis is split into blocks of about sqrt(len(t)) points, and every element is built from its block offset and
+	its position in the block with cos(x + y) = cos(x) cos(y) - sin(x) sin(y), instead of calling cos once per element.
+	"""
+	n = len(t)
+	size = math.isqrt(n)
+	full = n // size * size
+	step = (t[-1] - t[0]) / (n - 1) if n > 1 else 0.0
+
+	w = 2 * math.pi * f
+	inner = numpy.multiply.outer(step * numpy.arange(size), w)
+	outer = numpy.multiply.outer(t[0] + step * numpy.arange(0, n, size), w)
+
+	for table, buffer in ((numpy.cos, out), (numpy.sin, work)):
+		o = a * table(outer)
+		i = table(inner)
+		numpy.multiply(o[:full // size, None], i, out=buffer[:full].reshape(full // size, size, len(f)))
+		numpy.multiply(o[full // size:], i[:n - full], out=buffer[full:])
+
+	out -= work
+
+def _simulate(t: numpy.ndarray, a: float, f: numpy.ndarray, r: float, l: float, c: float, derivative_method: str, integral_method: str, vr: numpy.ndarray, vl: numpy.ndarray, vc: numpy.ndarray, vs: numpy.ndarray):
+	"""
+	Fills the (time x frequency) buffers vr, vl, vc and vs. Time runs down the first axis so that the derivative,
+	the running integral and the extrema all operate on whole contiguous rows.
+	"""
+	cos = vs
+	_cos_matrix(t, a, f, cos, vr)
+
+	numpy.multiply(cos, r, out=vr)
+	numerics.derivative(t, cos, derivative_method, out=vl, scale=l)
+	numerics.integral(t, cos, integral_method, out=vc, scale=1 / c)
+
+	numpy.add(vr, vl, out=vs)
+	vs += vc
+
+
+
+def phasor_peak_to_peak(a: float, f: list[float], r: float, l: float, c: float) -> numpy.ndarray:
+	"""
+	Returns the steady-state Vpp across the series RLC circuit for every frequency in f, in closed form.
+	A current of amplitude a produces a voltage of amplitude a|Z| across the input, with Z = R + jwL + 1/(jwC).
+	"""
+	w = 2 * math.pi * numpy.asarray(f, dtype=float)
+	return 2 * a * numpy.hypot(r, w * l - 1 / (w * c))
+
+def phasor_deviation(t: list[float], a: float, f: list[float], r: float, l: float, c: float) -> numpy.ndarray:
+	"""
+	Returns, for every frequency in f, how far the time-domain Vpp lies from the phasor Vpp.
+	"""
+	return sweep_peak_to_peak(t, a, f, r, l, c) - phasor_peak_to_peak(a, f, r, l, c)
+
+def adaptive_sweep(kernel: Callable[[numpy.ndarray], numpy.ndarray], start: float, stop: float, tolerance: float, points: int = 33, change: float = 0.05) -> tuple[numpy.ndarray, numpy.ndarray, int]:
+	"""
+	Sweeps the frequencies in [start, stop] with kernel, which maps an array of frequencies to their Vpp.
+	Starting from points evenly spaced frequencies, every interval whose Vpp changes by more than a fraction change, or
+	that borders a local minimum, is bisected until it is no wider than tolerance. Returns the sorted frequencies, their
+	Vpp, and the number of frequencies the kernel was evaluated at.
+	"""
+	if not tolerance > 0:
+		raise ValueError("The tolerance must be positive.")
+
+	f = numpy.linspace(start, stop, points)
+	v = numpy.asarray(kernel(f), dtype=float)
+	evaluations = len(f)
+
+	while True:
+		steep = numpy.abs(numpy.diff(v)) > change * numpy.minimum(v[:-1], v[1:])
+
+		padded = numpy.concatenate(([numpy.inf], v, [numpy.inf]))
+		minimum = (v <= padded[:-2]) & (v <= padded[2:])
+
+		# An interval too narrow for its midpoint to differ from both ends is never refined, however small tolerance is.
+		middle = (f[:-1] + f[1:]) / 2
+		refine = (steep | minimum[:-1] | minimum[1:]) & (numpy.diff(f) > tolerance) & (middle > f[:-1]) & (middle < f[1:])
+		if not refine.any():
+			return f, v, evaluations
+
+		midpoints = middle[refine]
+		evaluations += len(midpoints)
+
+		f = numpy.concatenate((f, midpoints))
+		v = numpy.concatenate((v, kernel(midpoints)))
+		order = numpy.argsort(f, kind="stable")
+		f = f[order]
+		v = v[order]
+
+def parallel_sweep(t: list[float], a: float, r: float, l: Iterable[float], c: Iterable[float], f: Iterable[float], workers: int | None = None, chunk: int = 256, vectorized: bool = False) -> Iterator[tuple[float, float, float, float]]:
+	"""
+	Computes the Vpp over the grid of inductances x capacitances x frequencies on a pool of worker processes.
+	The grid is split into chunks of consecutive points, and (l, c, f, vpp) is yielded for every point in grid order as
+	soon as its chunk is done. Each point goes through peak_to_peak, unless vectorized is set, in which case the points of
+	a chunk that share l and c go through sweep_peak_to_peak together.
+	"""
+	points = product(l, c, f)
+	workers = workers or os.cpu_count() or 1
+
+	with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(t, a, r, vectorized)) as pool:
+		# Only a few chunks per worker are kept in flight, so that huge grids are never materialized.
+		pending = deque()
+		while True:
+			while len(pending) < 2 * workers and (points_chunk := list(islice(points, chunk))):
+				pending.append((points_chunk, pool.submit(_sweep_chunk, points_chunk)))
+
+			if not pending:
+				return
+
+			points_chunk, future = pending.popleft()
+			for (lx, cx, fx), vpp in zip(points_chunk, future.result()):
+				yield lx, cx, fx, vpp
+
+_worker_args: tuple[list[float], float, float, bool] = ([], 0.0, 0.0, False)
+
+def _init_worker(t: list[float], a: float, r: float, vectorized: bool):
+	"""
+	Stores the arguments shared by every chunk in the worker process, so that they are sent only once per worker.
+	"""
+	global _worker_args
+	_worker_args = (t, a, r, vectorized)
+
+def _sweep_chunk(points: list[tuple[float, float, float]]) -> list[float]:
+	"""
+	Computes the Vpp for every (l, c, f) point of a chunk, in order.
+	"""
+	t, a, r, vectorized = _worker_args
+	if not vectorized:
+		return [peak_to_peak(t, a, fx, r, lx, cx) for lx, cx, fx in points]
+
+	vpp: list[float] = []
+	for (lx, cx), group in groupby(points, lambda point: point[:2]):
+		vpp.extend(sweep_peak_to_peak(t, a, [fx for _, _, fx in group], r, lx, cx).tolist())
+	return vpp
+
+
+
+# The error of a step that is only rounding, relative to the largest voltage of the state, and how many steps may be
+# rejected for every one that is kept.
+ROUNDING_ERROR = 64 * sys.float_info.epsilon
+REJECTED_STEPS = 16
+
+class Transient(NamedTuple):
+	t       : numpy.ndarray
+	i       : numpy.ndarray
+	vr      : numpy.ndarray
+	vl      : numpy.ndarray
+	vc      : numpy.ndarray
+	rejected: int
+
+def transient(source: Callable[[float], float], r: float, l: float, c: float, end: float, tolerance: float | None = 1e-6, start: float = 0.0, q: float = 0.0, i: float = 0.0, max_step: float | None = None) -> Transient:
+	"""
+	Solves the series RLC circuit driven by the source voltage source(t) from start to end, starting from a capacitor
+	charge q and a current i. The state (q, i) follows q' = i, L i' = v_s - R i - q / C, stepped with the implicit
+	trapezoidal rule, which stays stable at any step size however stiff the components are. Every step is also taken as
+	two half steps, and the difference between the two estimates the error of the step, in volts: a step is only kept if
+	that is within tolerance, and the next step grows or shrinks to match, up to max_step (by default a 64th of the
+	span). Without a tolerance, every step is max_step long and is kept without estimating its error. Returns the
+	timepoints of the steps, the current, V_R, V_L and V_C at each of them, and how many steps were rejected.
+	Raises ValueError if the tolerance is below the rounding error of the state, or if the steps keep being rejected.
+	"""
+	if tolerance != None and not tolerance > 0:
+		raise ValueError("The tolerance must be positive.")
+
+	span = end - start
+	max_step = span / 64 if max_step == None else max_step
+	if not max_step > 0:
+		raise ValueError("The maximum step must be positive.")
+
+	# Errors in the current are weighed in volts through the characteristic impedance, at which the energy in the
+	# inductor equals that in the capacitor.
+	impedance = math.sqrt(l / c)
+
+	t = start
+	vs = source(t)
+	h = max_step / 64 if tolerance != None else max_step
+	times, charges, currents, sources = [t], [q], [i], [vs]
+	rejected = 0
+
+	while t < end:
+		last = t + h >= end
+		if last:
+			h = end - t
+
+		v1 = source(t + h)
+		q1, i1 = _trapezoid_step(q, i, vs, v1, h, r, l, c)
+		error = 0.0
+
+		if tolerance != None:
+			vm = source(t + h / 2)
+			qh, ih = _trapezoid_step(q, i, vs, vm, h / 2, r, l, c)
+			qh, ih = _trapezoid_step(qh, ih, vm, v1, h / 2, r, l, c)
+
+			# The rule is second-order, so the two half steps are off by about a third of their difference from the full
+			# step. Their result is kept rather than extrapolated, as extrapolating would make stiff circuits unstable.
+			error = max(abs(qh - q1) / c, abs(ih - i1) * impedance) / 3
+			q1, i1 = qh, ih
+
+		if tolerance == None or error <= tolerance:
+			t = end if last else t + h
+			q, i, vs = q1, i1, v1
+			times.append(t)
+			charges.append(q)
+			currents.append(i)
+			sources.append(vs)
+
+		else:
+			rejected += 1
+
+			# Below the rounding error of the voltages, the error estimate is noise, and shrinking the step cannot meet the
+			# tolerance. Steps that keep being rejected without one being kept in between are stuck the same way.
+			if error <= ROUNDING_ERROR * max(abs(q1) / c, abs(i1) * impedance, abs(v1)):
+				raise ValueError(f"The tolerance is below the rounding error at t={t}, it cannot be met.")
+
+			if rejected > REJECTED_STEPS * len(times):
+				raise ValueError(f"{rejected} steps were rejected for {len(times) - 1} kept by t={t}, the tolerance cannot be met.")
+
+		if tolerance != None:
+			h = min(h * (min(max(0.9 * (tolerance / error) ** (1 / 3), 0.2), 5.0) if error != 0 else 5.0), max_step)
+			if t + h == t:
+				raise ValueError(f"The step size underflowed at t={t}, the tolerance cannot be met.")
+
+	t = numpy.array(times)
+	current = numpy.array(currents)
+	vr = r * current
+	vc = numpy.array(charges) / c
+
+	# V_L follows from Kirchhoff's voltage law rather than from differentiating the current.
+	return Transient(t, current, vr, numpy.array(sources) - vr - vc, vc, rejected)
+
+def phasor_source(a: float, f: float, r: float, l: float, c: float) -> Callable[[float], float]:
+	"""
+	Returns the source voltage that drives a current of a cos(2 pi f t) through the series RLC circuit in the steady
+	state, a|Z| cos(2 pi f t + arg Z).
+	"""
+	w = 2 * math.pi * f
+	z = complex(r, w * l - 1 / (w * c))
+	amplitude = a * abs(z)
+	phase = cmath.phase(z)
+
+	return lambda t: amplitude * math.cos(w * t + phase)
+
+def _trapezoid_step(q: float, i: float, vs0: float, vs1: float, h: float, r: float, l: float, c: float) -> tuple[float, float]:
+	"""
+	Advances the charge and current by h, given the source voltage at both ends of the step. With x = (q, i),
+	x' = A x + b v_s for A = [[0, 1], [-1 / LC, -R / L]] and b = (0, 1 / L), and the step solves
+	(I - h/2 A) x1 = (I + h/2 A) x0 + h/2 b (vs0 + vs1) in closed form.
+	"""
+	k = h / 2
+	rq = q + k * i
+	ri = i + k * (vs0 + vs1 - r * i - q / c) / l
+
+	m21 = k / (l * c)
+	m22 = 1 + k * r / l
+	det = m22 + k * m21
+
+	return (m22 * rq + k * ri) / det, (ri - m21 * rq) / det
+
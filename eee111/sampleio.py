@@ -0,0 +1,215 @@
+# SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
+# SPDX-License-Identifier: 0BSD
+
+from contextlib import nullcontext
+from itertools import islice
+from typing import BinaryIO, Iterable, Iterator
+
+import struct
+import sys
+import warnings
+
+import numpy
+
+from .commands import SAMPLE_RULES, parse_compiled
+from .signal import Signal
+
+
+
+def format_digits(x: numpy.ndarray, lines: numpy.ndarray, position: int, count: int):
+	digits = numpy.empty((len(x), count), numpy.uint8)
+	for i in range(count - 1, -1, -1):
+		quotient = x // 10
+		digits[:, i] = x - quotient * 10
+		x = quotient
+
+	digits += ord("0")
+	lines[:, position:position + count] = digits
+
+def format_samples(t: numpy.ndarray, v: numpy.ndarray) -> bytes:
+	# Builds the same bytes as f"{t:.9f} {v:.9f}\n" for every sample, one digit column at a time.
+	columns = []
+	width = 0
+	for x in (t, v):
+		scaled = numpy.abs(x) * 1e9
+		if len(x) == 0 or not numpy.isfinite(scaled).all() or scaled.max() >= 1e15:
+			return "".join(f"{tx:.9f} {vx:.9f}\n" for tx, vx in zip(t.tolist(), v.tolist())).encode()
+
+		rounded = numpy.rint(scaled)
+
+		# Values too close to a rounding tie for the scaled product to decide are rounded exactly instead.
+		ties = numpy.flatnonzero(numpy.abs(scaled - numpy.floor(scaled) - 0.5) <= 4 * numpy.spacing(scaled) + 1e-7)
+		rounded[ties] = [int(f"{abs(x[i]):.9f}".replace(".", "")) for i in ties.tolist()]
+
+		rounded = rounded.astype(numpy.int64)
+		whole = rounded // 1_000_000_000
+		fraction = (rounded - whole * 1_000_000_000).astype(numpy.uint32)
+		digits = len(str(int(whole.max())))
+
+		columns.append((numpy.signbit(x), whole, fraction, digits))
+		width += digits + 12
+
+	lines = numpy.empty((len(t), width), numpy.uint8)
+	keep = numpy.ones((len(t), width), bool)
+
+	position = 0
+	for separator, (negative, whole, fraction, digits) in zip(" \n", columns):
+		lines[:, position] = ord("-")
+		keep[:, position] = negative
+		position += 1
+
+		for i in range(digits - 1):
+			keep[:, position + i] = whole >= 10 ** (digits - 1 - i)
+		format_digits(whole, lines, position, digits)
+		position += digits
+
+		lines[:, position] = ord(".")
+		format_digits(fraction, lines, position + 1, 9)
+		lines[:, position + 10] = ord(separator)
+		position += 11
+
+	return lines[keep].tobytes()
+
+def signal_chunks(chunks: Iterable[tuple[numpy.ndarray, numpy.ndarray]] | Signal) -> Iterable[tuple[numpy.ndarray, numpy.ndarray]]:
+	# A whole signal is written a block at a time, so that only one block of times is ever computed.
+	if isinstance(chunks, Signal):
+		return (chunk.time_value() for chunk in chunks.chunks(BLOCK_LINES))
+
+	return chunks
+
+def write_samples(file: BinaryIO, chunks: Iterable[tuple[numpy.ndarray, numpy.ndarray]] | Signal):
+	for t, v in signal_chunks(chunks):
+		file.write(format_samples(t, v))
+
+SAMPLE_MAGIC = b"EEEWAVE\0"
+SAMPLE_HEADER = struct.Struct("<8sIIQQ")
+SAMPLE_FORMATS = {"f64": numpy.dtype("<f8"), "f32": numpy.dtype("<f4")}
+
+def write_binary(file: BinaryIO, points: int, chunks: Iterable[tuple[numpy.ndarray, numpy.ndarray]] | Signal, dtype: numpy.dtype):
+	# The header (magic, version, bytes per value, points, reserved) is followed by all of t, then all of v.
+	file.write(SAMPLE_HEADER.pack(SAMPLE_MAGIC, 1, dtype.itemsize, points, 0))
+
+	written = 0
+	for t, v in signal_chunks(chunks):
+		file.seek(SAMPLE_HEADER.size + written * dtype.itemsize)
+		file.write(t.astype(dtype).tobytes())
+		file.seek(SAMPLE_HEADER.size + (points + written) * dtype.itemsize)
+		file.write(v.astype(dtype).tobytes())
+		written += len(t)
+
+def sample_format(s: str) -> str:
+	if s == "text" or s in SAMPLE_FORMATS:
+		return s
+
+	else:
+		raise ValueError("The given string is not a sample format.")
+
+
+
+# A filename of - stands for stdin, which is always read as text.
+def is_binary(filename: str) -> bool:
+	if filename == "-":
+		return False
+
+	with open(filename, "rb") as file:
+		return file.read(len(SAMPLE_MAGIC)) == SAMPLE_MAGIC
+
+def read_samples(filename: str) -> tuple[numpy.ndarray, numpy.ndarray]:
+	# Binary files are mapped into memory rather than read, so t and v are views of the file itself.
+	header = b""
+	if filename != "-":
+		with open(filename, "rb") as file:
+			header = file.read(SAMPLE_HEADER.size)
+
+	if len(header) == SAMPLE_HEADER.size and header.startswith(SAMPLE_MAGIC):
+		_, version, itemsize, points, _ = SAMPLE_HEADER.unpack(header)
+		if version != 1:
+			raise ValueError(f"Unsupported sample file version {version}.")
+
+		if points == 0:
+			return numpy.empty(0), numpy.empty(0)
+
+		tv = numpy.memmap(filename, numpy.dtype(f"<f{itemsize}"), "r", SAMPLE_HEADER.size, (2, points))
+		return tv[0], tv[1]
+
+	tv = numpy.concatenate([numpy.empty((0, 2)), *read_text_samples(filename)])
+	return tv[:, 0], tv[:, 1]
+
+def read_signal(filename: str) -> tuple[numpy.ndarray | Signal, numpy.ndarray | None]:
+	# The samples as the analyzers take them: a Signal in place of the times if they are evenly spaced, in which case
+	# they are only read to check that and binary values stay mapped into memory, or else the times and values.
+	t, v = read_samples(filename)
+
+	try:
+		return Signal.from_samples(t, v), None
+
+	except ValueError:
+		return t, v
+
+
+
+BLOCK_LINES = 65536
+BLOCK_SIZE = 1 << 22
+
+def two_fields_per_line(text: str, lines: int) -> bool:
+	# Whether every line holds two whitespace-separated fields, given that there are 2 * lines numbers in all.
+	data = numpy.frombuffer(text.encode(), numpy.uint8)
+
+	if not any(c in text for c in "\t\r\v\f"):
+		# When every line has a single space, no line holds more than two fields, so none can hold fewer either. The
+		# spaces only need to alternate with the newlines.
+		spaces = numpy.flatnonzero(data == ord(" "))
+		if len(spaces) == lines:
+			newlines = numpy.flatnonzero(data == ord("\n"))
+			return bool(numpy.all(spaces[:len(newlines)] < newlines) and numpy.all(spaces[1:] > newlines[:lines - 1]))
+
+	newline = data == ord("\n")
+	blank = newline | (data == ord(" ")) | (data == ord("\t")) | (data == ord("\r")) | (data == ord("\v")) | (data == ord("\f"))
+
+	starts = ~blank
+	starts[1:] &= blank[:-1]
+
+	return bool(numpy.all(numpy.bincount(numpy.cumsum(newline)[starts], minlength=lines)[:lines] == 2))
+
+def parse_samples(text: str) -> numpy.ndarray:
+	lines = text.count("\n") + (text != "" and not text.endswith("\n"))
+
+	try:
+		with warnings.catch_warnings():
+			warnings.simplefilter("error", DeprecationWarning)
+			values = numpy.fromstring(text, sep=" ")
+
+		# The total alone would let a line with three numbers pair up with a line with one.
+		if len(values) == 2 * lines and two_fields_per_line(text, lines):
+			return values.reshape(-1, 2)
+
+	except (ValueError, DeprecationWarning):
+		pass
+
+	# Something other than two numbers per line, so the lines are parsed one by one, skipping the invalid ones.
+	tv: list[list[float]] = []
+	for line in text.splitlines():
+		if parsed := parse_compiled(SAMPLE_RULES, line.split()):
+			tv.append(parsed)
+
+	return numpy.array(tv, dtype=float).reshape(-1, 2)
+
+def read_input_samples(pts: int) -> Iterator[numpy.ndarray]:
+	for begin in range(0, pts, BLOCK_LINES):
+		yield parse_samples("".join(islice(sys.stdin, min(BLOCK_LINES, pts - begin))))
+
+def read_text_samples(filename: str) -> Iterator[numpy.ndarray]:
+	with open(filename, "r") if filename != "-" else nullcontext(sys.stdin) as file:
+		rest = ""
+		while block := file.read(BLOCK_SIZE):
+			block = rest + block
+			end = block.rfind("\n") + 1
+			rest = block[end:]
+
+			yield parse_samples(block[:end])
+
+		if rest != "":
+			yield parse_samples(rest)
+
+def print_throughput(samples: int, seconds: float):
+	print(f"{samples} samples in {seconds:.3f} s ({samples / max(seconds, 1e-9):.0f} samples/s)", file=sys.stderr)
@@ -0,0 +1,74 @@
+# SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
+# SPDX-License-Identifier: 0BSD
+
+from dataclasses import dataclass
+from typing import Iterator
+
+import numpy
+
+
+
+# How far read-back times may stray from a uniform grid: the 9 decimals of text files, a millionth of a step, and a few
+# roundings of the type they were stored in.
+UNIFORM_TOLERANCE = 1e-9
+UNIFORM_STEPS = 1e-6
+UNIFORM_ROUNDINGS = 4
+
+@dataclass
+class Signal:
+	start : float
+	step  : float
+	values: numpy.ndarray
+	offset: int = 0
+	stride: int = 1
+
+	# Only the values are stored. The time of sample i is start + step * (offset + stride * i), so a slice is a view of
+	# the same values with its own offset and stride, and its times are the same numbers its parent would give.
+	@classmethod
+	def from_samples(cls, t: numpy.ndarray, v: numpy.ndarray) -> "Signal":
+		t = numpy.asarray(t)
+		rounding = numpy.finfo(t.dtype).eps if numpy.issubdtype(t.dtype, numpy.floating) else 0.0
+		t = t.astype(float, copy=False)
+
+		if len(t) != len(v):
+			raise ValueError("There must be as many times as values.")
+
+		if len(t) < 2:
+			return cls(float(t[0]) if len(t) != 0 else 0.0, 0.0, numpy.asarray(v))
+
+		signal = cls(float(t[0]), float(t[-1] - t[0]) / (len(t) - 1), numpy.asarray(v))
+		tolerance = UNIFORM_TOLERANCE + UNIFORM_STEPS * abs(signal.step) + UNIFORM_ROUNDINGS * rounding * max(abs(t[0]), abs(t[-1]))
+		if not numpy.all(numpy.abs(signal.times() - t) <= tolerance):
+			raise ValueError("The samples are not evenly spaced.")
+
+		return signal
+
+	def __len__(self) -> int:
+		return len(self.values)
+
+	def __getitem__(self, index: slice) -> "Signal":
+		if not isinstance(index, slice):
+			raise TypeError("A signal can only be sliced. Index its values or times instead.")
+
+		first, _, stride = index.indices(len(self.values))
+		return Signal(self.start, self.step, self.values[index], self.offset + self.stride * first, self.stride * stride)
+
+	def __iter__(self) -> Iterator[tuple[float, float]]:
+		return zip(self.times().tolist(), self.values.tolist())
+
+	def times(self) -> numpy.ndarray:
+		return self.start + self.step * (self.offset + self.stride * numpy.arange(len(self.values)))
+
+	def time_value(self) -> tuple[numpy.ndarray, numpy.ndarray]:
+		return self.times(), self.values
+
+	def chunks(self, size: int) -> Iterator["Signal"]:
+		for begin in range(0, len(self.values), size):
+			yield self[begin:begin + size]
+
+def as_arrays(t: numpy.ndarray | Signal, v: numpy.ndarray | None = None) -> tuple[numpy.ndarray, numpy.ndarray | None]:
+	# Analyzers take either a Signal in place of the times, or the times and values as separate arrays.
+	if isinstance(t, Signal):
+		return t.times(), numpy.asarray(t.values, dtype=float)
+
+	return numpy.asarray(t, dtype=float), None if v is None else numpy.asarray(v, dtype=float)
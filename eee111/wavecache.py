@@ -0,0 +1,201 @@
+# SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
+# SPDX-License-Identifier: MPL-2.0
+
+from collections import OrderedDict
+from typing import Callable, Hashable, NamedTuple
+
+import hashlib
+import math
+import os
+import tempfile
+
+import numpy
+
+from . import numerics
+from .waveform import oscillate
+
+
+
+Grid = tuple[float, float, int]
+
+# Part of every key hashed into a file name, so that arrays saved by older generators are never read back. Bump it
+# whenever a generator changes what it returns.
+CACHE_VERSION = 2
+
+class CacheInfo(NamedTuple):
+	hits   : int
+	loads  : int
+	misses : int
+	entries: int
+	size   : int
+
+class WaveformCache:
+	"""
+	A least-recently-used cache of generated arrays, bounded by the total size of the arrays in bytes.
+	If a directory is given, arrays that are not in memory are looked up there before being generated, and newly
+	generated arrays are saved there, so that they are reused across runs. The directory is bounded by max_disk_size in
+	the same way, dropping the files that were least recently used.
+	"""
+
+	def __init__(self, max_size: int = 256 * 1024 * 1024, directory: str | None = None, max_disk_size: int = 1024 * 1024 * 1024):
+		self.max_size = max_size
+		self.directory = directory
+		self.max_disk_size = max_disk_size
+		self.entries: OrderedDict[Hashable, numpy.ndarray] = OrderedDict()
+		self.size = 0
+		self.hits = 0
+		self.loads = 0
+		self.misses = 0
+
+	def get(self, key: Hashable, generate: Callable[[], numpy.ndarray]) -> numpy.ndarray:
+		"""
+		Returns the array stored under key, generating it with generate if it is not cached. The array is read-only.
+		"""
+		if (array := self.entries.get(key)) is not None:
+			self.entries.move_to_end(key)
+			self.hits += 1
+			return array
+
+		path = None
+		if self.directory != None:
+			path = os.path.join(self.directory, hashlib.sha1(repr((CACHE_VERSION, key)).encode()).hexdigest() + ".npy")
+
+		array = self._load(path) if path != None else None
+		if array is not None:
+			self.loads += 1
+
+		else:
+			array = generate()
+			array.flags.writeable = False
+			self.misses += 1
+
+			if path != None:
+				self._save(path, array)
+
+		self.entries[key] = array
+		self.size += array.nbytes
+		while self.size > self.max_size and len(self.entries) > 1:
+			_, evicted = self.entries.popitem(last=False)
+			self.size -= evicted.nbytes
+
+		return array
+
+	def _load(self, path: str) -> numpy.ndarray | None:
+		"""
+		Maps the array saved at path, marking it as just used, or returns None if there is none. Another process may
+		remove the file at any time, which a mapped array outlives.
+		"""
+		try:
+			array = numpy.load(path, mmap_mode="r")
+			os.utime(path)
+
+		except FileNotFoundError:
+			return None
+
+		return array
+
+	def _save(self, path: str, array: numpy.ndarray):
+		"""
+		Saves the array at path, then removes the least recently used files until the directory fits max_disk_size.
+		The array is written to a temporary file first and renamed into place, so that other processes never load a
+		partly written file.
+		"""
+		os.makedirs(self.directory, exist_ok=True)
+
+		descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+		try:
+			with os.fdopen(descriptor, "wb") as file:
+				numpy.save(file, array)
+
+			os.replace(temporary, path)
+
+		except BaseException:
+			os.remove(temporary)
+			raise
+
+		files = []
+		for entry in os.scandir(self.directory):
+			if entry.name.endswith(".npy"):
+				try:
+					stat = entry.stat()
+
+				except FileNotFoundError:
+					continue
+
+				files.append((stat.st_mtime, stat.st_size, entry.path))
+
+		files.sort()
+		size = sum(size for _, size, _ in files)
+		for _, file_size, file_path in files:
+			if size <= self.max_disk_size or file_path == path:
+				break
+
+			try:
+				os.remove(file_path)
+
+			except FileNotFoundError:
+				pass
+
+			size -= file_size
+
+	def info(self) -> CacheInfo:
+		"""
+		Returns the hit, disk load and miss counters, and the number and total size of the cached arrays.
+		"""
+		return CacheInfo(self.hits, self.loads, self.misses, len(self.entries), self.size)
+
+	def clear(self):
+		"""
+		Empties the in-memory cache and resets its counters.
+		"""
+		self.entries.clear()
+		self.size = 0
+		self.hits = 0
+		self.loads = 0
+		self.misses = 0
+
+
+
+cache = WaveformCache(directory=os.environ.get("WAVECACHE_DIR"))
+
+
+
+def frange(start: float, stop: float, samples: int) -> numpy.ndarray:
+	"""
+	Generates an array of floats in the interval (start, stop) with a fixed step, (stop - start) / samples.
+	"""
+	def generate() -> numpy.ndarray:
+		step = (stop - start) / samples
+		return start + step * numpy.arange(samples)
+
+	return cache.get(("frange", start, stop, samples), generate)
+
+def cos_wave(grid: Grid, a: float, f: float) -> numpy.ndarray:
+	"""
+	Generates a cosine wave with an amplitude and a frequency over the timepoints frange(*grid).
+	"""
+	def generate() -> numpy.ndarray:
+		start, stop, samples = grid
+		values = numpy.empty(samples)
+		oscillate(values, 2 * math.pi * f * start + math.pi / 2, 2 * math.pi * f * (stop - start) / samples, 0, a)
+		return values
+
+	return cache.get(("cos_wave", grid, a, f), generate)
+
+def cos_derivative(grid: Grid, a: float, f: float, method: str = "backward") -> numpy.ndarray:
+	"""
+	Generates the slope of cos_wave(grid, a, f) at every timepoint, with a numerics.derivative method.
+	"""
+	def generate() -> numpy.ndarray:
+		return numerics.derivative(frange(*grid), cos_wave(grid, a, f), method)
+
+	return cache.get(("cos_derivative", grid, a, f, method), generate)
+
+def cos_integral(grid: Grid, a: float, f: float, method: str = "rectangle") -> numpy.ndarray:
+	"""
+	Generates the area below cos_wave(grid, a, f) from zero to every timepoint, with a numerics.integral method.
+	"""
+	def generate() -> numpy.ndarray:
+		return numerics.integral(frange(*grid), cos_wave(grid, a, f), method)
+
+	return cache.get(("cos_integral", grid, a, f, method), generate)
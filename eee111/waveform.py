@@ -0,0 +1,143 @@
+# SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
+# SPDX-License-Identifier: 0BSD
+
+from typing import Callable, Iterator
+
+import math
+
+import numpy
+
+from .signal import Signal
+
+
+
+CHUNK_POINTS = 65536
+
+# The oscillator rotates blocks of OSCILLATOR_BLOCK samples, OSCILLATOR_ROWS of them at a time, so that its tables and
+# its scratch space stay in the cache.
+OSCILLATOR_BLOCK = 4096
+OSCILLATOR_ROWS = 16
+
+def arange(start: float, end: float, points: int) -> numpy.ndarray:
+	return next(arange_chunks(start, (end - start) / (points - 1), points, max(points, 1)), numpy.empty(0))
+
+def arange_chunks(start: float, step: float, points: int, chunk: int = CHUNK_POINTS) -> Iterator[numpy.ndarray]:
+	# Every value is computed from its index rather than by adding up steps, so that the values do not drift, do not
+	# depend on the chunk size, and are the times of Signal(start, step, ...).
+	for begin in range(0, points, chunk):
+		yield start + step * numpy.arange(begin, min(begin + chunk, points))
+
+def sine(frequency: float, phase_shift: float, t: float | numpy.ndarray) -> float | numpy.ndarray:
+	return numpy.sin(2 * math.pi * frequency * (t + phase_shift))
+
+def time_value(f: Callable[[numpy.ndarray], numpy.ndarray], start: float, end: float, points: int) -> tuple[numpy.ndarray, numpy.ndarray]:
+	t = arange(start, end, points)
+	return t, f(t)
+
+def time_value_chunks(f: Callable[[numpy.ndarray], numpy.ndarray], start: float, end: float, points: int, chunk: int = CHUNK_POINTS) -> Iterator[tuple[numpy.ndarray, numpy.ndarray]]:
+	for t in arange_chunks(start, (end - start) / (points - 1), points, chunk):
+		yield t, f(t)
+
+def sine_signal(frequency: float, phase_shift: float, start: float, end: float, points: int) -> Signal:
+	# The samples of time_value(partial(sine, frequency, phase_shift), ...), from the oscillator.
+	step = (end - start) / (points - 1)
+	values = numpy.empty(points)
+	oscillate(values, 2 * math.pi * frequency * (start + phase_shift), 2 * math.pi * frequency * step)
+
+	return Signal(start, step, values)
+
+def sine_chunks(frequency: float, phase_shift: float, start: float, end: float, points: int, chunk: int = CHUNK_POINTS) -> Iterator[tuple[numpy.ndarray, numpy.ndarray]]:
+	# The chunks of time_value_chunks(partial(sine, frequency, phase_shift), ...), from the oscillator.
+	step = (end - start) / (points - 1)
+	for begin, t in zip(range(0, points, chunk), arange_chunks(start, step, points, chunk)):
+		v = numpy.empty_like(t)
+		oscillate(v, 2 * math.pi * frequency * (start + phase_shift), 2 * math.pi * frequency * step, begin)
+
+		yield t, v
+
+
+
+def oscillate(out: numpy.ndarray, phases: float | numpy.ndarray, increments: float | numpy.ndarray, first: int = 0, amplitudes: float | numpy.ndarray | None = None):
+	# Computes amplitude * sin(phase + increment * k) into every row of out, for the samples k = first, first + 1, ...
+	# of the row, with one phase, increment and amplitude per row or one for all of them.
+	#
+	# Like a direct digital synthesizer, it accumulates phase rather than taking the sine of every sample. Sample k is
+	# at offset r into block k // OSCILLATOR_BLOCK, and is the start of the block rotated by r increments,
+	# sin(start + increment * r) = sin(start) cos(increment * r) + cos(start) sin(increment * r). The sines and cosines
+	# of the offsets are tabulated once per increment, and those of the starts once per block, so that a sample costs
+	# two multiplications and an addition. Every start is computed from the index of its block rather than by rotating
+	# the one before, so that the error does not grow along the signal, and a sample is the same however the signal is
+	# split into rows and chunks. A sample is within a few units in the last place of the amplitude of the sine of its
+	# rounded phase, so its error is at most about amplitude * (1e-15 + 2 ** -52 * |phase|), as when taking the sine of
+	# every phase directly.
+	rows = out[None, :] if out.ndim == 1 else out
+	n, points = rows.shape
+	if n == 0 or points == 0:
+		return
+
+	if rows.strides[1] != rows.itemsize:
+		raise ValueError("The rows to oscillate into must be contiguous.")
+
+	phases = numpy.broadcast_to(numpy.asarray(phases, dtype=float), n)
+	increments = numpy.broadcast_to(numpy.asarray(increments, dtype=float), n)
+	amplitudes = numpy.broadcast_to(numpy.asarray(1.0 if amplitudes is None else amplitudes, dtype=float), n)
+
+	offset = first % OSCILLATOR_BLOCK
+	if offset + points <= OSCILLATOR_BLOCK:
+		# Every row lies within one block, so the rows are rotated together.
+		_rotate(rows, phases + increments * (first - offset), increments, amplitudes, offset)
+
+	else:
+		for row, phase, increment, amplitude in zip(rows, phases, increments, amplitudes):
+			_oscillate_row(row, phase, increment, amplitude, first)
+
+def _oscillate_row(row: numpy.ndarray, phase: float, increment: float, amplitude: float, first: int):
+	# A row that spans several blocks is rotated a block at a time, from the part of a block it starts in, through its
+	# whole blocks, to the part of a block it ends in.
+	points = len(row)
+	head = min(-first % OSCILLATOR_BLOCK, points)
+	blocks = (points - head) // OSCILLATOR_BLOCK
+	tail = head + blocks * OSCILLATOR_BLOCK
+
+	if head != 0:
+		_rotate(row[None, :head], numpy.array([phase + increment * (first - first % OSCILLATOR_BLOCK)]), increment, amplitude, first % OSCILLATOR_BLOCK)
+
+	if blocks != 0:
+		starts = increment * (OSCILLATOR_BLOCK * numpy.arange((first + head) // OSCILLATOR_BLOCK, (first + tail) // OSCILLATOR_BLOCK))
+		_rotate(row[head:tail].reshape(blocks, OSCILLATOR_BLOCK), phase + starts, increment, amplitude, 0)
+
+	if tail != points:
+		_rotate(row[None, tail:], numpy.array([phase + increment * (first + tail)]), increment, amplitude, 0)
+
+def _rotate(blocks: numpy.ndarray, starts: numpy.ndarray, increments: float | numpy.ndarray, amplitudes: float | numpy.ndarray, offset: int):
+	# Computes amplitude * sin(start + increment * r) into every row of blocks, for r = offset, offset + 1, ...
+	n, points = blocks.shape
+	increments = numpy.broadcast_to(increments, n)
+	amplitudes = numpy.broadcast_to(amplitudes, n)
+
+	unique, which = numpy.unique(increments, return_inverse=True)
+	angles = numpy.multiply.outer(unique, numpy.arange(offset, offset + points))
+	cos = numpy.cos(angles)
+	sin = numpy.sin(angles)
+
+	s = amplitudes * numpy.sin(starts)
+	c = amplitudes * numpy.cos(starts)
+
+	rows = max(OSCILLATOR_ROWS * OSCILLATOR_BLOCK // points, 1)
+	scratch = numpy.empty((min(rows, n), points))
+	for begin in range(0, n, rows):
+		end = min(begin + rows, n)
+		block = blocks[begin:end]
+		rotated = scratch[:end - begin]
+
+		if len(unique) == 1:
+			numpy.multiply(cos, s[begin:end, None], out=block)
+			numpy.multiply(sin, c[begin:end, None], out=rotated)
+
+		else:
+			numpy.take(cos, which[begin:end], axis=0, out=block)
+			block *= s[begin:end, None]
+			numpy.take(sin, which[begin:end], axis=0, out=rotated)
+			rotated *= c[begin:end, None]
+
+		block += rotated
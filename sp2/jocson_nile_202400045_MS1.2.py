@@ -1,162 +1,90 @@
 # SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
 # SPDX-License-Identifier: 0BSD
 
-from dataclasses import dataclass
-from functools import partial
-from typing import Any, Callable
+from typing import Any
 
-import math
+import os
+import sys
 
-import matplotlib.pyplot as plot
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from eee111.commands import CommandSpec, Rule, Transform, compile_commandspecs, compile_rules, dispatch, input_list, job_commands, parse_compiled, repl, run_batch, symbol_map
+from eee111.keying import bitstring, fsk_chunks, fsk_signal, keying, keying_chunks, keying_signal
+from eee111.plotting import plot_decimated, pyplot
+from eee111.sampleio import SAMPLE_FORMATS, sample_format, write_binary, write_samples
 
 
-@dataclass
-class Transform:
-	convert : type | Callable
-	position: int
 
-@dataclass
-class Rule:
-	transforms : list[Transform]
-	find_string: str | None = None
+BITSTRING_RULES = compile_rules([Rule([Transform(bitstring, 0)])])
 
-@dataclass
-class CommandSpec:
-	rules   : list[Rule]
-	callback: Callable[..., bool]
 
 
+def input_bits() -> str:
+	# The bits are not optional like the arguments of a command, so a line that is not a bitstring is an error, which
+	# batch mode exits with 1 on, rather than nothing to do.
+	if parsed := parse_compiled(BITSTRING_RULES, input_list("> ")):
+		return parsed[0]
 
-def input_list(prompt: str) -> list[str]:
-	return input(prompt).split()
+	raise ValueError("The given string is not a bitstring.")
 
+def print_fsk(freq0: float, freq1: float, dur: float, pts: int, continuous: bool = False) -> bool:
+	bits = input_bits()
+	sys.stdout.flush()
+	write_samples(sys.stdout.buffer, fsk_chunks(freq0, freq1, dur, pts, bits, continuous))
+	sys.stdout.buffer.flush()
 
+	return True
 
-def parse_rules(rules: list[Rule], command: list[str]) -> list[Any] | None:
-	if len(command) != len(rules):
-		return None
-
-	outputs = 0
-	for rule in rules:
-		outputs += len(rule.transforms)
-
-	parsed: list[Any] = [None] * outputs
-
-	for rule, arg in zip(rules, command):
-		if rule.find_string != None and rule.find_string != arg:
-			return None
-
-		try:
-			for transform in rule.transforms:
-				parsed[transform.position] = transform.convert(arg)
-
-		except:
-			return None
-
-	return parsed
-
-def try_commandspecs(specs: list[CommandSpec], command: list[str], default: Callable[[], bool]) -> bool:
-	for spec in specs:
-
-		if (parsed := parse_rules(spec.rules, command)) != None:
-			return spec.callback(*parsed)
-
-	return default()
-
-
-
-def arange(start: float, end: float, points: int) -> list[float]:
-	r: list[float] = []
-	step = (end - start) / (points - 1)
-
-	current = start
-	for _ in range(points):
-		r.append(current)
-		current += step
-
-	return r
-
-
-
-def sine(frequency: float, phase_shift: float, t: float) -> float:
-	return math.sin(2 * math.pi * frequency * (t + phase_shift))
-
-def time_value(f: Callable[[float], float], start: float, end: float, points: int) -> list[tuple[float, float]]:
-	tv: list[tuple[float, float]] = []
-
-	for t in arange(start, end, points):
-		tv.append((t, f(t)))
-
-	return tv
-
-def fsk(frequency0: float, frequency1: float, duration: float, points: int, bits: str) -> list[tuple[float, float]]:
-	fsk: list[tuple[float, float]] = []
-
-	n = len(bits)
-
-	endpoints = arange(0, duration, n + 1)
-	for i in range(n):
-		start = endpoints[i]
-		end = endpoints[i + 1]
-
-		frequency = frequency0
-		if bits[i] == "1":
-			frequency = frequency1
-
-		fsk.extend(time_value(partial(sine, frequency, (start - end) * i), start, end, points // n + 1))
-		fsk.pop()
-
-	fsk.append((duration, 0))
-
-	return fsk
-
-
+def plot_fsk(freq0: float, freq1: float, dur: float, pts: int, continuous: bool = False) -> bool:
+	bits = input_bits()
+	plot = pyplot()
+	figure, axis = plot.subplots()
+	plot_decimated(axis, fsk_signal(freq0, freq1, dur, pts, bits, continuous))
+	plot.show()
 
-def bitstring(s: str) -> str:
-	if all(c in '01' for c in s):
-		return s
+	return True
 
-	else:
-		raise ValueError("The given string is not a bitstring.")
+def out_fsk(freq0: float, freq1: float, dur: float, pts: int, filename: str, fmt: str = "text", continuous: bool = False) -> bool:
+	bits = input_bits()
+	with open(filename, "wb") as file:
+		chunks = fsk_chunks(freq0, freq1, dur, pts, bits, continuous)
+		if fmt == "text":
+			write_samples(file, chunks)
 
+		else:
+			write_binary(file, len(bits) * (pts // len(bits)) + 1, chunks, SAMPLE_FORMATS[fmt])
 
+	return True
 
-def print_fsk(freq0: float, freq1: float, dur: float, pts: int) -> bool:
-	if parsed := parse_rules(
-		[Rule([Transform(bitstring, 0)])],
-		input_list("> ")
-	):
-		bits = parsed[0]
-		tv = fsk(freq0, freq1, dur, pts, bits)
-		for t, v in tv:
-			print(f"{t:.9f} {v:.9f}")
+def print_keying(modulation: str, carrier: float, levels: list[float], dur: float, pts: int, continuous: bool = False) -> bool:
+	bits = input_bits()
+	frequencies, amplitudes, phases, continuous = keying(modulation, carrier, levels, bits, continuous)
+	sys.stdout.flush()
+	write_samples(sys.stdout.buffer, keying_chunks(dur, pts, frequencies, amplitudes, phases, continuous))
+	sys.stdout.buffer.flush()
 
 	return True
 
-def plot_fsk(freq0: float, freq1: float, dur: float, pts: int) -> bool:
-	if parsed := parse_rules(
-		[Rule([Transform(bitstring, 0)])],
-		input_list("> ")
-	):
-		bits = parsed[0]
-		tv = fsk(freq0, freq1, dur, pts, bits)
-		figure, axis = plot.subplots()
-		axis.plot(*zip(*tv))
-		plot.show()
+def plot_keying(modulation: str, carrier: float, levels: list[float], dur: float, pts: int, continuous: bool = False) -> bool:
+	bits = input_bits()
+	frequencies, amplitudes, phases, continuous = keying(modulation, carrier, levels, bits, continuous)
+	plot = pyplot()
+	figure, axis = plot.subplots()
+	plot_decimated(axis, keying_signal(dur, pts, frequencies, amplitudes, phases, continuous))
+	plot.show()
 
 	return True
 
-def out_fsk(freq0: float, freq1: float, dur: float, pts: int, filename: str) -> bool:
-	if parsed := parse_rules(
-		[Rule([Transform(bitstring, 0)])],
-		input_list("> ")
-	):
-		bits = parsed[0]
-		tv = fsk(freq0, freq1, dur, pts, bits)
-		with open(filename, "w") as file:
-			for t, v in tv:
-				print(f"{t:.9f} {v:.9f}", file=file)
+def out_keying(modulation: str, carrier: float, levels: list[float], dur: float, pts: int, filename: str, fmt: str = "text", continuous: bool = False) -> bool:
+	bits = input_bits()
+	frequencies, amplitudes, phases, continuous = keying(modulation, carrier, levels, bits, continuous)
+	with open(filename, "wb") as file:
+		chunks = keying_chunks(dur, pts, frequencies, amplitudes, phases, continuous)
+		if fmt == "text":
+			write_samples(file, chunks)
+
+		else:
+			write_binary(file, len(frequencies) * (pts // len(frequencies)) + 1, chunks, SAMPLE_FORMATS[fmt])
 
 	return True
 
@@ -170,87 +98,192 @@ def help_string(info: str | None = None) -> bool:
 		info = ""
 
 	print(f"""{ info }Usage:
-	<freq0:float> <freq1:float> <dur:float> <pts:int>                    Generates the time-voltage format of a FSK signal.
+	<freq0:float> <freq1:float> <dur:float> <pts:int>                                 Generates the time-voltage format of a FSK signal.
+	<bits:str>
+	<freq0:float> <freq1:float> <dur:float> <pts:int> plot                            Same as the first, but shows a plot of the signal.
 	<bits:str>
-	<freq0:float> <freq1:float> <dur:float> <pts:int> plot               Same as the first, but shows a plot of the signal.
+	<freq0:float> <freq1:float> <dur:float> <pts:int> out <filename:str>              Same as the first, but saves the values into a file.
 	<bits:str>
-	<freq0:float> <freq1:float> <dur:float> <pts:int> out <filename:str> Same as the first, but saves the values into a file.
+	<freq0:float> <freq1:float> <dur:float> <pts:int> out <filename:str> <format:str> Same as the third, but in the given format: text, f64 or f32.
 	<bits:str>
-	help                                                                 Prints this message.
-	exit                                                                 Exits the program."""
+	<freq0:float> <freq1:float> <dur:float> <pts:int> continuous [...]                Same as the above, but the phase carries over from one bit to the next.
+	<bits:str>
+	mfsk <freqs:map> <dur:float> <pts:int> [continuous] [...]                         Same as the above, but for M-FSK, where the comma-separated frequencies
+	<bits:str>                                                                        stand for the symbols 0, 1, ... of log2(M) bits each, most significant first.
+	ask <freq:float> <amps:map> <dur:float> <pts:int> [...]                           Same as the above, but for ASK on a carrier of the given frequency, with the
+	<bits:str>                                                                        comma-separated amplitudes of the symbols.
+	psk <freq:float> <phases:map> <dur:float> <pts:int> [...]                         Same as the above, but for PSK on a carrier of the given frequency, with the
+	<bits:str>                                                                        comma-separated phases of the symbols in degrees.
+	help                                                                              Prints this message.
+	exit                                                                              Exits the program.
+
+Given a command as its arguments, or -f <jobfile:str> with one command per line, runs without prompts and exits with 0
+on success, 1 on an error, or 2 on an invalid command. The bits of each command are read from stdin."""
 	)
 
 	return True
 
 
 
+def keying_commandspecs(modulation: str) -> list[CommandSpec]:
+	# The print, plot and out commands of a modulation. M-FSK takes no carrier, since its levels are frequencies.
+	rules = [Rule([], modulation)]
+	if modulation != "mfsk":
+		rules.append(Rule([Transform(float, 0)]))
+
+	count = len(rules) - 1
+	rules += [Rule([Transform(symbol_map, count)]), Rule([Transform(float, count + 1)]), Rule([Transform(int, count + 2)])]
+
+	def arguments(*args: Any) -> tuple[Any, ...]:
+		return (modulation, 0.0, *args) if modulation == "mfsk" else (modulation, *args)
+
+	specs: list[CommandSpec] = []
+	for tail, callback in [
+		([], print_keying),
+		([Rule([], "plot")], plot_keying),
+		([Rule([], "out"), Rule([Transform(str, count + 3)])], out_keying),
+		([Rule([], "out"), Rule([Transform(str, count + 3)]), Rule([Transform(sample_format, count + 4)])], out_keying)
+	]:
+		specs.append(CommandSpec(rules + tail, lambda *args, callback=callback: callback(*arguments(*args))))
+
+		if modulation == "mfsk":
+			specs.append(CommandSpec(
+				rules + [Rule([], "continuous")] + tail,
+				lambda *args, callback=callback: callback(*arguments(*args), continuous=True)
+			))
+
+	return specs
+
+COMMANDS = compile_commandspecs(
+	[
+		CommandSpec(
+			[
+				Rule([Transform(float, 0)]),
+				Rule([Transform(float, 1)]),
+				Rule([Transform(float, 2)]),
+				Rule([Transform(int, 3)])
+			],
+			print_fsk
+		),
+
+		CommandSpec(
+			[
+				Rule([Transform(float, 0)]),
+				Rule([Transform(float, 1)]),
+				Rule([Transform(float, 2)]),
+				Rule([Transform(int, 3)]),
+				Rule([], "plot")
+			],
+			plot_fsk
+		),
+
+		CommandSpec(
+			[
+				Rule([Transform(float, 0)]),
+				Rule([Transform(float, 1)]),
+				Rule([Transform(float, 2)]),
+				Rule([Transform(int, 3)]),
+				Rule([], "out"),
+				Rule([Transform(str, 4)])
+			],
+			out_fsk
+		),
+
+		CommandSpec(
+			[
+				Rule([Transform(float, 0)]),
+				Rule([Transform(float, 1)]),
+				Rule([Transform(float, 2)]),
+				Rule([Transform(int, 3)]),
+				Rule([], "out"),
+				Rule([Transform(str, 4)]),
+				Rule([Transform(sample_format, 5)])
+			],
+			out_fsk
+		),
+
+		CommandSpec(
+			[
+				Rule([Transform(float, 0)]),
+				Rule([Transform(float, 1)]),
+				Rule([Transform(float, 2)]),
+				Rule([Transform(int, 3)]),
+				Rule([], "continuous")
+			],
+			lambda *args: print_fsk(*args, continuous=True)
+		),
+
+		CommandSpec(
+			[
+				Rule([Transform(float, 0)]),
+				Rule([Transform(float, 1)]),
+				Rule([Transform(float, 2)]),
+				Rule([Transform(int, 3)]),
+				Rule([], "continuous"),
+				Rule([], "plot")
+			],
+			lambda *args: plot_fsk(*args, continuous=True)
+		),
+
+		CommandSpec(
+			[
+				Rule([Transform(float, 0)]),
+				Rule([Transform(float, 1)]),
+				Rule([Transform(float, 2)]),
+				Rule([Transform(int, 3)]),
+				Rule([], "continuous"),
+				Rule([], "out"),
+				Rule([Transform(str, 4)])
+			],
+			lambda *args: out_fsk(*args, continuous=True)
+		),
+
+		CommandSpec(
+			[
+				Rule([Transform(float, 0)]),
+				Rule([Transform(float, 1)]),
+				Rule([Transform(float, 2)]),
+				Rule([Transform(int, 3)]),
+				Rule([], "continuous"),
+				Rule([], "out"),
+				Rule([Transform(str, 4)]),
+				Rule([Transform(sample_format, 5)])
+			],
+			lambda *args: out_fsk(*args, continuous=True)
+		),
+
+		*keying_commandspecs("mfsk"),
+		*keying_commandspecs("ask"),
+		*keying_commandspecs("psk"),
+
+		CommandSpec(
+			[
+				Rule([], "help")
+			],
+			lambda: help_string()
+		),
+
+		CommandSpec(
+			[
+				Rule([], "exit")
+			],
+			lambda: False
+		)
+	]
+)
+
 def run_command(command: list[str]) -> bool:
-	return try_commandspecs(
-		[
-			CommandSpec(
-				[
-					Rule([Transform(float, 0)]),
-					Rule([Transform(float, 1)]),
-					Rule([Transform(float, 2)]),
-					Rule([Transform(int, 3)])
-				],
-				print_fsk
-			),
-
-			CommandSpec(
-				[
-					Rule([Transform(float, 0)]),
-					Rule([Transform(float, 1)]),
-					Rule([Transform(float, 2)]),
-					Rule([Transform(int, 3)]),
-					Rule([], "plot")
-				],
-				plot_fsk
-			),
-
-			CommandSpec(
-				[
-					Rule([Transform(float, 0)]),
-					Rule([Transform(float, 1)]),
-					Rule([Transform(float, 2)]),
-					Rule([Transform(int, 3)]),
-					Rule([], "out"),
-					Rule([Transform(str, 4)])
-				],
-				out_fsk
-			),
-
-			CommandSpec(
-				[
-					Rule([], "help")
-				],
-				lambda: help_string()
-			),
-
-			CommandSpec(
-				[
-					Rule([], "exit")
-				],
-				lambda: False
-			)
-		],
-		command,
-		lambda: help_string("Invalid arguments provided.")
-	)
+	return dispatch(COMMANDS, command, lambda: help_string("Invalid arguments provided."))
 
 
 
 def __main__():
-	while True:
-		try:
-			if run_command(input_list("> ")) == False:
-				return
-
-		except Exception as e:
-			print(e)
+	if len(sys.argv) > 1:
+		sys.exit(run_batch(COMMANDS, job_commands(sys.argv[1:])))
 
-		print("")
+	repl(run_command)
 
 
 
-__main__()
+if __name__ == "__main__":
+	__main__()
@@ -1,95 +1,53 @@
 # SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
 # SPDX-License-Identifier: 0BSD
 
-from dataclasses import dataclass
-from itertools import pairwise
-from typing import Any, Callable
+import os
+import sys
+import time
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from eee111.commands import SAMPLE_RULES, CommandSpec, Rule, Transform, compile_commandspecs, dispatch, input_list, job_commands, parse_compiled, repl, run_batch
+from eee111.crossings import CrossingCounter
 
-@dataclass
-class Transform:
-	convert : type | Callable
-	position: int
 
-@dataclass
-class Rule:
-	transforms : list[Transform]
-	find_string: str | None = None
 
-@dataclass
-class CommandSpec:
-	rules   : list[Rule]
-	callback: Callable[..., bool]
-
-
-
-def input_list(prompt: str) -> list[str]:
-	return input(prompt).split()
-
-
-
-def parse_rules(rules: list[Rule], command: list[str]) -> list[Any] | None:
-	if len(command) != len(rules):
-		return None
-
-	outputs = 0
-	for rule in rules:
-		outputs += len(rule.transforms)
-
-	parsed: list[Any] = [None] * outputs
-
-	for rule, arg in zip(rules, command):
-		if rule.find_string != None and rule.find_string != arg:
-			return None
-
-		try:
-			for transform in rule.transforms:
-				parsed[transform.position] = transform.convert(arg)
-
-		except:
-			return None
-
-	return parsed
-
-def try_commandspecs(specs: list[CommandSpec], command: list[str], default: Callable[[], bool]) -> bool:
-	for spec in specs:
-
-		if (parsed := parse_rules(spec.rules, command)) != None:
-			return spec.callback(*parsed)
-
-	return default()
+def print_crossing(pts: int) -> bool:
+	counter = CrossingCounter()
 
+	for _ in range(pts):
+		if parsed := parse_compiled(SAMPLE_RULES, input_list("> ")):
+			counter.add(parsed[1])
 
+	print(counter.crossings)
 
-def count_crossings(tv: list[tuple[float, float]]) -> int:
-	no_zeroes = [xy for xy in tv if xy[1] != 0]
+	return True
 
-	crossings = 0
-	for x, y in pairwise(no_zeroes):
-		if x[1] * y[1] < 0:
-			crossings += 1
+def print_crossing_bulk(pts: int) -> bool:
+	# Importing numpy slows every start, so what needs it is only imported where it is used, and counting prompted
+	# samples starts without it.
+	from eee111.crossings import count_value_crossings
+	from eee111.sampleio import print_throughput, read_input_samples
 
-	return crossings
+	start = time.perf_counter()
 
+	crossings, samples = count_value_crossings(tv[:, 1] for tv in read_input_samples(pts))
 
+	print(crossings)
+	print_throughput(samples, time.perf_counter() - start)
 
-def print_crossing(pts: int) -> bool:
-	tv: list[tuple[float, float]] = []
+	return True
 
-	for _ in range(pts):
-		if parsed := parse_rules(
-			[Rule([Transform(float, 0)]), Rule([Transform(float, 1)])],
-			input_list("> ")
-		):
-			t = parsed[0]
-			v = parsed[1]
+def print_crossing_file(filename: str) -> bool:
+	from eee111.crossings import count_value_crossings, value_chunks
+	from eee111.sampleio import print_throughput
 
-			tv.append((t, v))
+	start = time.perf_counter()
 
-	crossings = count_crossings(tv)
+	crossings, samples = count_value_crossings(value_chunks(filename))
 
 	print(crossings)
+	print_throughput(samples, time.perf_counter() - start)
 
 	return True
 
@@ -106,55 +64,75 @@ def help_string(info: str | None = None) -> bool:
 	<pts:int>               Outputs the number of zero-crossings in the given signal.
 	<t:float> <v:float>
 	...
+	<pts:int> bulk          Same as the first, but reads the signal in blocks without prompts and reports the throughput.
+	<t:float> <v:float>
+	...
+	file <filename:str>     Same as the first, but reads the signal from a text or binary file and reports the throughput.
 	help                    Prints this message.
-	exit                    Exits the program."""
+	exit                    Exits the program.
+
+Given a command as its arguments, or -f <jobfile:str> with one command per line, runs without prompts and exits with 0
+on success, 1 on an error, or 2 on an invalid command. A filename of - reads the signal from stdin, so that the output
+of MS1.1 or MS1.2 can be piped straight in."""
 	)
 
 	return True
 
 
 
+COMMANDS = compile_commandspecs(
+	[
+		CommandSpec(
+			[
+				Rule([Transform(int, 0)])
+			],
+			print_crossing
+		),
+
+		CommandSpec(
+			[
+				Rule([Transform(int, 0)]),
+				Rule([], "bulk")
+			],
+			print_crossing_bulk
+		),
+
+		CommandSpec(
+			[
+				Rule([], "file"),
+				Rule([Transform(str, 0)])
+			],
+			print_crossing_file
+		),
+
+		CommandSpec(
+			[
+				Rule([], "help")
+			],
+			lambda: help_string()
+		),
+
+		CommandSpec(
+			[
+				Rule([], "exit")
+			],
+			lambda: False
+		)
+	]
+)
+
 def run_command(command: list[str]) -> bool:
-	return try_commandspecs(
-		[
-			CommandSpec(
-				[
-					Rule([Transform(int, 0)])
-				],
-				print_crossing
-			),
-
-			CommandSpec(
-				[
-					Rule([], "help")
-				],
-				lambda: help_string()
-			),
-
-			CommandSpec(
-				[
-					Rule([], "exit")
-				],
-				lambda: False
-			)
-		],
-		command,
-		lambda: help_string("Invalid arguments provided.")
-	)
+	return dispatch(COMMANDS, command, lambda: help_string("Invalid arguments provided."))
 
 
 
 def __main__():
-	while True:
-		try:
-			if run_command(input_list("> ")) == False:
-				return
-
-		except Exception as e:
-			print(e)
+	if len(sys.argv) > 1:
+		sys.exit(run_batch(COMMANDS, job_commands(sys.argv[1:])))
 
-		print("")
+	repl(run_command)
 
 
 
-__main__()
+if __name__ == "__main__":
+	__main__()
@@ -1,120 +1,155 @@
 # SPDX-FileCopyrightText: Copyright (C) Nile Jocson <novoseiversia@gmail.com>
 # SPDX-License-Identifier: 0BSD
 
-from dataclasses import dataclass
-from itertools import pairwise
-from typing import Any, Callable
+from collections import deque
+from typing import TYPE_CHECKING, Any
 
+import os
+import sys
+import time
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-@dataclass
-class Transform:
-	convert : type | Callable
-	position: int
+from eee111.commands import SAMPLE_RULES, CommandSpec, Rule, Transform, compile_commandspecs, dispatch, input_list, job_commands, parse_compiled, repl, run_batch, symbol_map
 
-@dataclass
-class Rule:
-	transforms : list[Transform]
-	find_string: str | None = None
+# Importing numpy takes longer than the rest of a start, so the demodulators, which need it, are only imported by the
+# commands that use them, and help, exit and invalid commands start without it.
+if TYPE_CHECKING:
+	import numpy
 
-@dataclass
-class CommandSpec:
-	rules   : list[Rule]
-	callback: Callable[..., bool]
 
 
+def print_demodulate(pts: int, bits: int, freq0: float | None = None, freq1: float | None = None) -> bool:
+	t: list[float] = []
+	v: list[float] = []
 
-def input_list(prompt: str) -> list[str]:
-	return input(prompt).split()
+	for _ in range(pts):
+		if parsed := parse_compiled(SAMPLE_RULES, input_list("> ")):
+			t.append(parsed[0])
+			v.append(parsed[1])
+
+	import numpy
 
+	from eee111.demod import demodulate_samples, tone_demodulate
 
+	if freq0 != None and freq1 != None:
+		sequence = tone_demodulate(bits, numpy.array(t), numpy.array(v), freq0, freq1)
 
-def parse_rules(rules: list[Rule], command: list[str]) -> list[Any] | None:
-	if len(command) != len(rules):
-		return None
+	else:
+		sequence = demodulate_samples(bits, numpy.array(t), numpy.array(v))
 
-	outputs = 0
-	for rule in rules:
-		outputs += len(rule.transforms)
+	print("".join("1" if bit else "0" for bit in sequence))
 
-	parsed: list[Any] = [None] * outputs
+	return True
+
+def print_keying_demodulate(pts: int, bits: int, modulation: str, carrier: float, levels: list[float]) -> bool:
+	t: list[float] = []
+	v: list[float] = []
+
+	for _ in range(pts):
+		if parsed := parse_compiled(SAMPLE_RULES, input_list("> ")):
+			t.append(parsed[0])
+			v.append(parsed[1])
 
-	for rule, arg in zip(rules, command):
-		if rule.find_string != None and rule.find_string != arg:
-			return None
+	import numpy
 
-		try:
-			for transform in rule.transforms:
-				parsed[transform.position] = transform.convert(arg)
+	print_keying(modulation, bits, numpy.array(t), numpy.array(v), carrier, levels)
 
-		except:
-			return None
+	return True
 
-	return parsed
+def print_keying_demodulate_file(filename: str, bits: int, modulation: str, carrier: float, levels: list[float]) -> bool:
+	from eee111.sampleio import read_signal
 
-def try_commandspecs(specs: list[CommandSpec], command: list[str], default: Callable[[], bool]) -> bool:
-	for spec in specs:
+	t, v = read_signal(filename)
 
-		if (parsed := parse_rules(spec.rules, command)) != None:
-			return spec.callback(*parsed)
+	print_keying(modulation, bits, t, v, carrier, levels)
 
-	return default()
+	return True
 
+def print_keying(modulation: str, bits: int, t: "numpy.ndarray", v: "numpy.ndarray", carrier: float, levels: list[float]):
+	from eee111.demod import keying_demodulate, keying_efficiency
 
+	sequence = keying_demodulate(modulation, bits, t, v, carrier, levels)
 
-def demodulate(bits: int, tv: list[tuple[float, float]]) -> list[bool]:
-	sequence: list[bool] = []
+	print("".join("1" if bit else "0" for bit in sequence))
 
-	no_zeroes = [xy for xy in tv if xy[1] != 0]
+	rate, bandwidth = keying_efficiency(modulation, bits, t, carrier, levels)
+	print(f"{rate:.6g} bits/s in {bandwidth:.6g} Hz ({rate / bandwidth:.3f} bits/s/Hz)", file=sys.stderr)
 
-	duration = no_zeroes[-1][0]
-	bit_duration = duration / bits
+def print_demodulate_stream(pts: int, bit_duration: float | None = None, preamble: int = 0) -> bool:
+	from eee111.demod import StreamDemodulator
 
-	crossings: list[int] = [0] * bits
-	bit = 0
-	for x, y in pairwise(no_zeroes):
-		if x[0] > bit_duration * (bit + 1) and bit < bits - 1:
-			bit += 1
+	demodulator = StreamDemodulator(bit_duration, preamble)
 
-		if x[1] * y[1] < 0:
-			crossings[bit] += 1
+	for _ in range(pts):
+		if parsed := parse_compiled(SAMPLE_RULES, input_list("")):
+			for bit in demodulator.add(parsed[0], parsed[1]):
+				print("1" if bit else "0", end="", flush=True)
 
-	frequencies = [(c / 2) / bit_duration for c in crossings]
-	threshold = sum(frequencies) / len(frequencies)
-	for f in frequencies:
-		if f > threshold:
-			sequence.append(True)
+	print("".join("1" if bit else "0" for bit in demodulator.flush()))
 
-		else:
-			sequence.append(False)
+	return True
 
-	return sequence
+def print_demodulate_file(filename: str, bits: int, freq0: float | None = None, freq1: float | None = None) -> bool:
+	from eee111.demod import demodulate_samples, tone_demodulate
+	from eee111.sampleio import read_signal
 
+	t, v = read_signal(filename)
 
+	if freq0 != None and freq1 != None:
+		sequence = tone_demodulate(bits, t, v, freq0, freq1)
 
-def print_demodulate(pts: int, bits: int) -> bool:
-	tv: list[tuple[float, float]] = []
+	else:
+		sequence = demodulate_samples(bits, t, v)
 
-	for _ in range(pts):
-		if parsed := parse_rules(
-			[Rule([Transform(float, 0)]), Rule([Transform(float, 1)])],
-			input_list("> ")
-		):
-			t = parsed[0]
-			v = parsed[1]
+	print("".join("1" if bit else "0" for bit in sequence))
 
-			tv.append((t, v))
+	return True
 
-	sequence = demodulate(bits, tv)
 
-	for bit in sequence:
-		if bit:
-			print("1", end="")
 
-		else:
-			print("0", end="")
+def print_demodulate_batch(path: str, bits: int | None = None, workers: int | None = None) -> bool:
+	# Importing multiprocessing slows every start, so it is only imported here, where it is used.
+	from concurrent.futures import ProcessPoolExecutor
 
-	print()
+	from eee111.demod import batch_jobs, demodulate_capture
+
+	start = time.perf_counter()
+
+	jobs = iter(batch_jobs(path, bits))
+	workers = workers or os.cpu_count() or 1
+
+	captures = 0
+	failed = 0
+	samples = 0
+	with ProcessPoolExecutor(workers) as pool:
+		# Only a few captures per worker are kept in flight, and results are printed in job order as they finish.
+		pending = deque()
+		while True:
+			while len(pending) < 2 * workers and (job := next(jobs, None)) != None:
+				pending.append((job[0], pool.submit(demodulate_capture, *job)))
+
+			if not pending:
+				break
+
+			filename, future = pending.popleft()
+			sequence, points, seconds = future.result()
+
+			print(f"{filename} {sequence} {points} {seconds * 1000:.1f} ms", flush=True)
+
+			captures += 1
+			failed += sequence.startswith("error")
+			samples += points
+
+	elapsed = time.perf_counter() - start
+	print(
+		f"{captures} captures ({failed} failed), {samples} samples in {elapsed:.3f} s on {workers} workers"
+		f" ({captures / max(elapsed, 1e-9):.1f} captures/s)",
+		file=sys.stderr
+	)
+
+	if failed != 0:
+		raise RuntimeError(f"{failed} of {captures} captures failed.")
 
 	return True
 
@@ -128,59 +163,219 @@ def help_string(info: str | None = None) -> bool:
 		info = ""
 
 	print(f"""{ info }Usage:
-	<pts:int> <bits:int>    Demodulates the given FSK signal.
+	<pts:int> <bits:int>              Demodulates the given FSK signal.
 	<t:float> <v:float>
 	...
-	help                    Prints this message.
-	exit                    Exits the program."""
+	<pts:int> <bits:int> tone <freq0:float> <freq1:float>
+	<t:float> <v:float>               Same as the first, but decides each bit by whether freq1 or freq0 has more energy in
+	...                               it, which still works with few samples per bit or with noise.
+	file <filename:str> <bits:int>    Same as the first, but reads the signal from a text or binary file.
+	file <filename:str> <bits:int> tone <freq0:float> <freq1:float>
+	                                  Same as above, but with tone detection.
+	<pts:int> <bits:int> mfsk <freqs:map>
+	<t:float> <v:float>               Same as the first, but for M-FSK, where the comma-separated frequencies stand for the
+	...                               symbols 0, 1, ... of log2(M) bits each, most significant first. The bit rate and
+	                                  bandwidth are printed to stderr.
+	<pts:int> <bits:int> ask <freq:float> <amps:map>
+	<t:float> <v:float>               Same as above, but for ASK on a carrier of the given frequency, with the
+	...                               comma-separated amplitudes of the symbols.
+	<pts:int> <bits:int> psk <freq:float> <phases:map>
+	<t:float> <v:float>               Same as above, but for PSK on a carrier of the given frequency, with the
+	...                               comma-separated phases of the symbols in degrees.
+	file <filename:str> <bits:int> mfsk|ask|psk ...
+	                                  Same as above, but reads the signal from a text or binary file.
+	stream <pts:int> <bit_duration:float>
+	<t:float> <v:float>               Demodulates the given FSK signal as it arrives, printing every bit as soon as its
+	...                               window closes. Windows start at the first sample, and the threshold sits between
+	                                  the lowest and highest bit frequencies so far, so bits read as 0 until both tones
+	                                  have been seen.
+	stream <pts:int> <bit_duration:float> <preamble:int>
+	<t:float> <v:float>               Same as above, but the first preamble bits only set the threshold to their mean
+	...                               frequency.
+	stream <pts:int> preamble <preamble:int>
+	<t:float> <v:float>               Same as above, but the bit duration and the threshold are learned from a preamble
+	...                               of alternating bits, which starts the windows at its first bit.
+	batch <directory:str> <bits:int>  Demodulates every capture file in a directory on a pool of processes, printing
+	                                  "<filename> <bits> <samples> <time>" per capture and the totals to stderr.
+	batch <manifest:str>              Same as above, but for the "<filename> <bits>" lines of a manifest file.
+	batch <directory:str> <bits:int> workers <workers:int>
+	batch <manifest:str> workers <workers:int>
+	                                  Same as the two above, but on the given number of processes instead of one per
+	                                  core. A batch with failed captures ends with an error once the totals are printed.
+	help                              Prints this message.
+	exit                              Exits the program.
+
+Given a command as its arguments, or -f <jobfile:str> with one command per line, runs without prompts and exits with 0
+on success, 1 on an error, or 2 on an invalid command. A filename of - reads the signal from stdin, so that the output
+of MS1.2 can be piped straight in."""
 	)
 
 	return True
 
 
 
+def keying_commandspecs(modulation: str) -> list[CommandSpec]:
+	# The prompted and file commands of a modulation. M-FSK takes no carrier, since its levels are frequencies.
+	levels = [Rule([Transform(symbol_map, 2)])]
+	if modulation != "mfsk":
+		levels = [Rule([Transform(float, 2)]), Rule([Transform(symbol_map, 3)])]
+
+	def arguments(*args: Any) -> tuple[Any, ...]:
+		return (*args[:2], modulation, 0.0, *args[2:]) if modulation == "mfsk" else (*args[:2], modulation, *args[2:])
+
+	return [
+		CommandSpec(
+			[Rule([Transform(int, 0)]), Rule([Transform(int, 1)]), Rule([], modulation), *levels],
+			lambda *args: print_keying_demodulate(*arguments(*args))
+		),
+
+		CommandSpec(
+			[Rule([], "file"), Rule([Transform(str, 0)]), Rule([Transform(int, 1)]), Rule([], modulation), *levels],
+			lambda *args: print_keying_demodulate_file(*arguments(*args))
+		)
+	]
+
+COMMANDS = compile_commandspecs(
+	[
+		CommandSpec(
+			[
+				Rule([Transform(int, 0)]),
+				Rule([Transform(int, 1)])
+			],
+			print_demodulate
+		),
+
+		CommandSpec(
+			[
+				Rule([Transform(int, 0)]),
+				Rule([Transform(int, 1)]),
+				Rule([], "tone"),
+				Rule([Transform(float, 2)]),
+				Rule([Transform(float, 3)])
+			],
+			print_demodulate
+		),
+
+		CommandSpec(
+			[
+				Rule([], "file"),
+				Rule([Transform(str, 0)]),
+				Rule([Transform(int, 1)])
+			],
+			print_demodulate_file
+		),
+
+		CommandSpec(
+			[
+				Rule([], "file"),
+				Rule([Transform(str, 0)]),
+				Rule([Transform(int, 1)]),
+				Rule([], "tone"),
+				Rule([Transform(float, 2)]),
+				Rule([Transform(float, 3)])
+			],
+			print_demodulate_file
+		),
+
+		*keying_commandspecs("mfsk"),
+		*keying_commandspecs("ask"),
+		*keying_commandspecs("psk"),
+
+		CommandSpec(
+			[
+				Rule([], "stream"),
+				Rule([Transform(int, 0)]),
+				Rule([Transform(float, 1)])
+			],
+			print_demodulate_stream
+		),
+
+		CommandSpec(
+			[
+				Rule([], "stream"),
+				Rule([Transform(int, 0)]),
+				Rule([Transform(float, 1)]),
+				Rule([Transform(int, 2)])
+			],
+			print_demodulate_stream
+		),
+
+		CommandSpec(
+			[
+				Rule([], "stream"),
+				Rule([Transform(int, 0)]),
+				Rule([], "preamble"),
+				Rule([Transform(int, 1)])
+			],
+			lambda pts, preamble: print_demodulate_stream(pts, None, preamble)
+		),
+
+		CommandSpec(
+			[
+				Rule([], "batch"),
+				Rule([Transform(str, 0)]),
+				Rule([Transform(int, 1)])
+			],
+			print_demodulate_batch
+		),
+
+		CommandSpec(
+			[
+				Rule([], "batch"),
+				Rule([Transform(str, 0)]),
+				Rule([Transform(int, 1)]),
+				Rule([], "workers"),
+				Rule([Transform(int, 2)])
+			],
+			print_demodulate_batch
+		),
+
+		CommandSpec(
+			[
+				Rule([], "batch"),
+				Rule([Transform(str, 0)]),
+				Rule([], "workers"),
+				Rule([Transform(int, 1)])
+			],
+			lambda path, workers: print_demodulate_batch(path, None, workers)
+		),
+
+		CommandSpec(
+			[
+				Rule([], "batch"),
+				Rule([Transform(str, 0)])
+			],
+			print_demodulate_batch
+		),
+
+		CommandSpec(
+			[
+				Rule([], "help")
+			],
+			lambda: help_string()
+		),
+
+		CommandSpec(
+			[
+				Rule([], "exit")
+			],
+			lambda: False
+		)
+	]
+)
+
 def run_command(command: list[str]) -> bool:
-	return try_commandspecs(
-		[
-			CommandSpec(
-				[
-					Rule([Transform(int, 0)]),
-					Rule([Transform(int, 1)])
-				],
-				print_demodulate
-			),
-
-			CommandSpec(
-				[
-					Rule([], "help")
-				],
-				lambda: help_string()
-			),
-
-			CommandSpec(
-				[
-					Rule([], "exit")
-				],
-				lambda: False
-			)
-		],
-		command,
-		lambda: help_string("Invalid arguments provided.")
-	)
+	return dispatch(COMMANDS, command, lambda: help_string("Invalid arguments provided."))
 
 
 
 def __main__():
-	while True:
-		try:
-			if run_command(input_list("> ")) == False:
-				return
-
-		except Exception as e:
-			print(e)
+	if len(sys.argv) > 1:
+		sys.exit(run_batch(COMMANDS, job_commands(sys.argv[1:])))
 
-		print("")
+	repl(run_command)
 
 
 
-__main__()
+if __name__ == "__main__":
+	__main__()